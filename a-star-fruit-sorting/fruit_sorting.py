@@ -1,8 +1,10 @@
 import sys
-import heapq
 import itertools
 import pprint
 
+# shared search core in the root of the repository, which has to be on PYTHONPATH (see README)
+from best_first_search import BestFirstSearch
+
 
 def swap(state, row1, col1, row2, col2):
     """
@@ -154,40 +156,37 @@ def get_move_lst(state):
   
 
   
-def a_star(initial_state):
+def a_star(initial_state, max_nodes=None, max_seconds=None):
     """
     Implement the A* search algorithm to find the optimal solution to the game, given the initial state.
     
     Args:
     - initial_state: a tuple of tuples representing the initial state of the game
+    - max_nodes: maximum number of states to expand, no limit by default
+    - max_seconds: maximum time of the search, no limit by default
     
     Returns:
-    - A tuple (g, result_state), where g is the cost of the optimal solution and result_state is the goal state
+    - A tuple (g, result_state), where g is the cost of the optimal solution and result_state is the goal state,
+        or None when no goal state is reached within the limits. When a limit stops the search
+        the goal state found so far is returned, it may need more swaps than the optimal one.
     """
   
     goals = make_goal_states(initial_state)
     goal_idx_maps = get_goal_state_idx(goals)
     move_lst = get_move_lst(initial_state)
-  
-    heap = [(manhattan_heuristic(initial_state, goal_idx_maps), 0, initial_state)]
-    heapq.heapify(heap)
-    visited = set()
-    while heap:
-        f, g, state = heapq.heappop(heap)
-        if state in visited:
-            continue
-        visited.add(state)
-        if is_goal(state):
-            return (g, state)
-
-        for move in move_lst:
-            i1, j1, i2, j2 = move
-            new_state = swap(state, i1, j1, i2, j2)
-            if new_state not in visited:
-                new_g = g + 1
-                f = new_g + manhattan_heuristic(new_state, goal_idx_maps)
-                heapq.heappush(heap, (f, new_g, new_state))
-    return None
+
+    # a state is expanded once, like the visited set of a plain A* loop
+    search = BestFirstSearch(
+        successors=lambda state: (swap(state, i1, j1, i2, j2) for i1, j1, i2, j2 in move_lst),
+        heuristic=lambda state: manhattan_heuristic(state, goal_idx_maps),
+        is_goal=is_goal,
+        reopen=False,
+        max_nodes=max_nodes,
+        max_seconds=max_seconds)
+    result_state = search.search(initial_state)
+    if result_state is None:
+        return None
+    return (search.cost(result_state), result_state)
     
 
   
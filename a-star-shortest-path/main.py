@@ -1,7 +1,12 @@
 import sys
-import heapq
 import numpy as np
 
+# shared search core in the root of the repository, which has to be on PYTHONPATH (see README)
+from best_first_search import BestFirstSearch
+
+# maximum number of states expanded before giving up
+MAX_V = 10 ** 4
+
 class State:
     """Object to define the states
     
@@ -46,6 +51,7 @@ def get_next_states(state, capacities):
     """
     
     next_states = []
+    seen = {tuple(state.volumes)}
     for i in range(len(capacities)):
         for j in range(len(capacities)):
             if i == j:
@@ -58,7 +64,8 @@ def get_next_states(state, capacities):
                 diff = capacities[j] - next_volumes[j]
                 next_volumes[j] = capacities[j]
                 next_volumes[i] -= diff
-            if (str(State(next_volumes)) not in [str(h) for h in next_states]) and (str(State(next_volumes)) != str(state)):
+            if tuple(next_volumes) not in seen:
+                seen.add(tuple(next_volumes))
                 next_states.append(State(next_volumes))
     for i in range(1, len(capacities)):
         next_volumes = state.volumes[:]
@@ -91,66 +98,45 @@ def heuristic(state, target_volume):
 
 
 # A* algorithm implementation
-def a_star(start_volumes, capacities, target_volume):
+def a_star(start_volumes, capacities, target_volume, max_nodes=MAX_V, max_seconds=None):
     """ Runs A* search algorithm
         Args:
-          start_volumes (list) 
+          start_volumes (list): starting amount of water in each pitcher
+          capacities (list): given total volumes of pitchers
+          target_volume (int): the goal amount of water to be in infinite pitcher
+          max_nodes (int): maximum number of states to expand
+          max_seconds (float): maximum time of the search, no limit by default
+
+        Returns:
+          (g, state, visited): number of steps to the goal state, the goal state linked to
+            the states of its path by `_prev` and the expanded states. g is -1 and state is
+            None when no goal state is generated within the budgets, a goal state found when
+            a budget runs out is returned even though a shorter path may exist.
     """
-    start_state = State(start_volumes)
-    start_state.h = heuristic(start_state, target_volume)
-    start_state.f = start_state.g + start_state.h
-    
-    # Initializing the heap with the `start_state`
-    heap = [start_state]
-    heapq.heapify(heap)
-    visited = []
-    visited_str = []
+    search = BestFirstSearch(
+        successors=lambda state: get_next_states(state, capacities),
+        heuristic=lambda state: heuristic(state, target_volume),
+        is_goal=lambda state: state == target_volume,
+        encode=lambda state: tuple(state.volumes),
+        max_nodes=max_nodes,
+        max_seconds=max_seconds)
+
+    goal_state = search.search(State(start_volumes))
+    visited = [search.nodes[key][2] for key in search.closed]
+    if goal_state is None:
+        return (-1, None, visited)
+
+    # linking the states of the path with their A* scores
+    prev = None
+    for state in search.path(goal_state):
+        state.g = search.cost(state)
+        state.h = heuristic(state, target_volume)
+        state.f = state.g + state.h
+        state._prev = prev
+        prev = state
+    return (goal_state.g, goal_state, visited)
 
-    
-    MAX_V = 10 ** 4
-    while heap and len(visited) < MAX_V:
-        
-        # if len(visited) % 10000 == 0:
-        #     print(f"{len(visited)} visites states")
-        
-        """
-        Terminate conditions:
-            maximum number of iterations or a maximum depth
-            available computation resourches
-        """
-        
-#         if len(visited) % 1000 == 0:
-#             print(len(visited), end=", ")
-
-        state = heapq.heappop(heap)
-        visited.append(state)
-        visited_str.append(str(state))
-        if state == target_volume:
-            return (state.g, state, visited)
-
-        next_states = get_next_states(state, capacities)
-        
-        # Generating next states and adding them to the heap
-        for next_state in next_states:
-
-            next_state.g = state.g + 1
-            next_state.h = heuristic(next_state, target_volume)
-            next_state.f = next_state.g + next_state.h
-            next_state._prev = state
-
-            # checking if we come accross to the same state
-                # and if its A* score is less than previous one
-                    # then we add it
-            if (str(next_state) in visited_str):
-                if next_state.f < visited[visited_str.index(str(next_state))].f:
-                    heapq.heappush(heap, next_state)
-                else:
-                    continue
-            else:
-                heapq.heappush(heap, next_state)
 
-    return (-1, state, visited)
-            
 def txt_parser(filename=None):
     if filename is None:
         raise ValueError("No file name given")
@@ -0,0 +1,176 @@
+"""Benchmark of MiniMax vs MiniMaxAlphaBeta
+
+Generates uniform trees over a grid of branch factors, depths and leaf distributions and
+measures tree building, evaluation, nodes visited, leaves evaluated and peak memory separately
+for every engine. Times are the best of `--repeat` runs, memory comes from its own traced run
+since tracing slows the search down.
+
+  python adversarial_benchmark.py                        # table of the default grid
+  python adversarial_benchmark.py -b 2 3 -d 6 8 --json   # JSON records
+"""
+import argparse
+import json
+import math
+import sys
+import tracemalloc
+from time import perf_counter
+
+import numpy as np
+
+from adversarial_search import MiniMax, MiniMaxAlphaBeta, tree_depth, vectorized_value
+
+DISTRIBUTIONS = ['random', 'best-first', 'worst-first']
+ENGINES = ['minimax', 'alphabeta', 'minimax-implicit', 'alphabeta-implicit', 'vectorized']
+# `Node` trees above this many leaves take too long and too much memory to be worth building
+MAX_NODE_TREE_LEAVES = 3 ** 10
+
+
+def order_leaves(leaves, branch_factor, best_first=True):
+  """Rearranges the subtrees so that every node lists its children best first (or worst first)
+
+    Best first for Max is the highest value, for Min the lowest, which is the ordering under which
+    alpha-beta visits the minimal tree. The root value does not change.
+  """
+  leaves = np.asarray(leaves, dtype=float)
+  values = leaves
+  for d in range(tree_depth(len(leaves), branch_factor) - 2, -1, -1):
+    n_parents = len(values) // branch_factor
+    child_values = values.reshape(n_parents, branch_factor)
+    descending = (d % 2 == 0) == best_first
+    order = np.argsort(-child_values if descending else child_values, axis=1, kind='stable')
+    # the subtree of every child is a contiguous block of leaves, move the blocks with their roots
+    blocks = leaves.reshape(n_parents, branch_factor, -1)
+    leaves = blocks[np.arange(n_parents)[:, None], order].reshape(-1)
+    values = child_values.max(axis=1) if d % 2 == 0 else child_values.min(axis=1)
+  return leaves
+
+
+def make_leaves(branch_factor, depth, distribution, rng):
+  """Leaves of a uniform tree of `depth` levels (leaf level included)"""
+  leaves = rng.random(branch_factor ** (depth - 1))
+  if distribution == 'random':
+    return leaves
+  return order_leaves(leaves, branch_factor, best_first=distribution == 'best-first')
+
+
+def build(engine, leaves, branch_factor):
+  """Builds the tree of `engine`
+
+    Returns:
+      (tree, evaluate): evaluate() runs the search and returns the root value, `tree` is None
+        for the vectorized evaluation which has no tree object
+  """
+  if engine == 'vectorized':
+    return (None, lambda: vectorized_value(leaves, branch_factor))
+
+  implicit = engine.endswith('-implicit')
+  term_nodes = leaves if implicit else leaves.tolist()
+  if engine.startswith('alphabeta'):
+    tree = MiniMaxAlphaBeta(branch_factor, term_nodes, implicit=implicit)
+    root = tree.build_tree()
+    return (tree, lambda: tree.value(root, -math.inf, math.inf))
+  tree = MiniMax(branch_factor, term_nodes, implicit=implicit)
+  root = tree.build_tree()
+  return (tree, lambda: tree.value(root))
+
+
+def run_engine(engine, leaves, branch_factor):
+  """Builds and evaluates the tree once
+
+    Returns:
+      (value, build seconds, evaluation seconds, nodes visited, leaves evaluated)
+  """
+  tic = perf_counter()
+  tree, evaluate = build(engine, leaves, branch_factor)
+  toc = perf_counter()
+  value = evaluate()
+  seconds = perf_counter() - toc
+  if tree is None:
+    # the vectorized evaluation touches every node
+    n_nodes = (branch_factor * len(leaves) - 1) // (branch_factor - 1)
+    return (value, toc - tic, seconds, n_nodes, len(leaves))
+  return (value, toc - tic, seconds, tree.nodes_visited, tree.leaves_evaluated)
+
+
+def peak_memory(engine, leaves, branch_factor):
+  """Peak traced memory in bytes of building and of evaluating the tree
+
+    The evaluation peak leaves out the tree, which is still allocated while it is searched.
+  """
+  tracemalloc.start()
+  try:
+    _, evaluate = build(engine, leaves, branch_factor)
+    tree_size, build_peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    evaluate()
+    return (build_peak, tracemalloc.get_traced_memory()[1] - tree_size)
+  finally:
+    tracemalloc.stop()
+
+
+def run(branch_factors, depths, distributions=DISTRIBUTIONS, engines=ENGINES, repeat=3, seed=0,
+        memory=True):
+  records = []
+  for branch_factor in branch_factors:
+    for depth in depths:
+      for distribution in distributions:
+        rng = np.random.default_rng(seed)
+        leaves = make_leaves(branch_factor, depth, distribution, rng)
+        for engine in engines:
+          if not engine.endswith(('-implicit', 'vectorized')) and len(leaves) > MAX_NODE_TREE_LEAVES:
+            continue
+          runs = [run_engine(engine, leaves, branch_factor) for _ in range(repeat)]
+          value, _, _, nodes, n_leaves = runs[0]
+          record = {
+            'branch_factor': branch_factor,
+            'depth': depth,
+            'distribution': distribution,
+            'engine': engine,
+            'value': float(value),
+            'build_seconds': min(r[1] for r in runs),
+            'eval_seconds': min(r[2] for r in runs),
+            'nodes_visited': nodes,
+            'leaves_evaluated': n_leaves,
+            'leaves': len(leaves),
+          }
+          if memory:
+            record['build_peak_memory'], record['eval_peak_memory'] = peak_memory(engine, leaves, branch_factor)
+          records.append(record)
+  return records
+
+
+def print_table(records):
+  print(f"{'b':>3}{'d':>4} {'leaves':<12}{'engine':<20}{'build [ms]':>11}{'eval [ms]':>11}"
+        f"{'nodes':>10}{'evaluated':>11}{'build KiB':>11}{'eval KiB':>10}")
+  for r in records:
+    print(f"{r['branch_factor']:>3}{r['depth']:>4} {r['distribution']:<12}{r['engine']:<20}"
+          f"{r['build_seconds'] * 1e3:>11.2f}{r['eval_seconds'] * 1e3:>11.2f}"
+          f"{r['nodes_visited']:>10}{r['leaves_evaluated']:>11}"
+          f"{r.get('build_peak_memory', math.nan) / 1024:>11.1f}{r.get('eval_peak_memory', math.nan) / 1024:>10.1f}")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+  parser.add_argument('-b', '--branch-factors', type=int, nargs='+', default=[2, 3, 5])
+  parser.add_argument('-d', '--depths', type=int, nargs='+', default=[4, 6, 8],
+                      help='levels of the tree, leaf level included')
+  parser.add_argument('--distributions', nargs='+', choices=DISTRIBUTIONS, default=DISTRIBUTIONS)
+  parser.add_argument('--engines', nargs='+', choices=ENGINES, default=ENGINES)
+  parser.add_argument('--repeat', type=int, default=3)
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--no-memory', action='store_true', help='skip the traced memory runs')
+  parser.add_argument('--json', action='store_true', help='print JSON records instead of a table')
+  args = parser.parse_args()
+
+  records = run(args.branch_factors, args.depths, args.distributions, args.engines, args.repeat,
+                args.seed, memory=not args.no_memory)
+  if args.json:
+    json.dump(records, sys.stdout, indent=2)
+    print()
+  else:
+    print_table(records)
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -1,7 +1,62 @@
 import math
+import multiprocessing
 import random
+from bisect import bisect_right
 from time import perf_counter
 
+import numpy as np
+
+
+def tree_depth(n_leaves, branch_factor):
+  """Depth of the uniform tree holding `n_leaves` leaves, the leaf level included"""
+  if branch_factor < 2:
+    # a chain of any depth has a single leaf, the depth can not be told from the leaves
+    raise ValueError(f"A uniform tree needs a branch factor of at least 2, got {branch_factor}")
+  depth, size = 1, branch_factor
+  # integer version of int(log(n_leaves, branch_factor)) + 1, the float log is off for e.g. 3**5
+  while size <= n_leaves:
+    depth += 1
+    size *= branch_factor
+  return depth
+
+
+def vectorized_value(leaves, branch_factor, expmax=False):
+  """Evaluates full (unpruned) uniform trees bottom-up with NumPy
+
+    Every level is a reshape to (-1, branch_factor) and a max, min or mean over the last axis,
+    Max at even depths and Min (or Expmax) at odd depths like `MiniMax`.
+
+    Args:
+      leaves (array): terminal values of one tree, or a 2-D (n_trees, n_leaves) batch of
+        independent trees, e.g. random leaf assignments of a Monte Carlo evaluation
+      branch_factor (int): branch factor of the trees
+      expmax (bool): chance nodes with uniform probabilities instead of Min nodes
+
+    Returns:
+      value of the root, or an array with the root value of every tree of the batch
+  """
+  values = np.asarray(leaves, dtype=float)
+  batch = values.ndim == 2
+  if not batch:
+    values = values[None]
+
+  n_trees, n_leaves = values.shape
+  depth = tree_depth(n_leaves, branch_factor)
+  if n_leaves != branch_factor ** (depth - 1):
+    raise ValueError(f"A uniform tree needs a power of {branch_factor} leaves, got {n_leaves}")
+
+  for d in range(depth - 2, -1, -1):
+    values = values.reshape(n_trees, -1, branch_factor)
+    if d % 2 == 0:
+      values = values.max(axis=2)
+    elif expmax:
+      values = values.mean(axis=2)
+    else:
+      values = values.min(axis=2)
+
+  values = values[:, 0]
+  return values if batch else values[0]
+
 
 class Node:
 
@@ -16,23 +71,56 @@ class Node:
 
 
 class MiniMax:
-
-  def __init__(self, branch_factor=None, term_nodes=None, expmax=False):
+  """MiniMax over a tree of `Node` objects, or over an implicit tree with `implicit=True`
+
+    The implicit tree keeps the terminal values in a flat NumPy array and addresses the nodes
+    by their index in level order: the root is 0, the children of node i are i*b+1 ... i*b+b
+    for branch factor b and the last level are the leaves. No node object is allocated, so
+    trees with millions of leaves can be evaluated. It needs exactly b**(tree_depth-1) leaves.
+
+    Instead of `term_nodes` the implicit tree can take an `evaluator` callable and the `depth`
+    of the tree (leaf level included). evaluator(i) returns the value of the i-th leaf and is
+    only called when the search reaches that leaf, so leaves cut off by pruning cost nothing.
+    `leaves_evaluated` counts the terminal values the search used and `nodes_visited` every
+    node it entered, leaves included.
+  """
+
+  def __init__(self, branch_factor=None, term_nodes=None, expmax=False, implicit=False,
+               evaluator=None, depth=None):
     self.branch_factor = branch_factor
-    self.term_nodes = list(reversed(term_nodes))
-    # depth grows exponentially w.r.t branch factor
-    self.tree_depth = int(math.log(len(term_nodes), branch_factor)) + 1
     self.expmax = expmax
+    self.evaluator = evaluator
+    self.implicit = implicit or evaluator is not None
+    self.leaves_evaluated = 0
+    self.nodes_visited = 0
+    if evaluator is not None:
+      if depth is None:
+        raise ValueError("A lazy tree needs its depth")
+      self.tree_depth = depth
+    else:
+      # depth grows exponentially w.r.t branch factor
+      self.tree_depth = tree_depth(len(term_nodes), branch_factor)
+
+    if self.implicit:
+      if evaluator is None:
+        self.leaves = np.asarray(term_nodes, dtype=float)
+        if len(self.leaves) != branch_factor ** (self.tree_depth - 1):
+          raise ValueError(f"An implicit tree needs a power of {branch_factor} leaves, got {len(self.leaves)}")
+      # index of the first node of every level
+      self._level_start = [(branch_factor ** d - 1) // (branch_factor - 1) for d in range(self.tree_depth)]
+      self._first_leaf = self._level_start[-1]
+    else:
+      self.term_nodes = list(reversed(term_nodes))
 
   def build_tree(self, temp_depth=0):
+    if self.implicit:
+      # nothing to build, the root is node 0
+      return 0
+
     if temp_depth == self.tree_depth:
       return None
 
-    if temp_depth % 2 == 0:
-      spec = 'Max'
-    else:
-      spec = 'Min' if self.expmax == False else 'Expmax'
-
+    spec = self.level_spec(temp_depth)
     val = None if temp_depth != self.tree_depth-1 else self.term_nodes.pop()
     node = Node(val, temp_depth, spec)
 
@@ -43,45 +131,85 @@ class MiniMax:
 
     return node
 
+  def vectorized_value(self):
+    """Value of the implicit tree computed level by level, see `vectorized_value`"""
+    if not self.implicit:
+      raise ValueError("The vectorized evaluation needs the leaf array of an implicit tree (implicit=True)")
+    if self.evaluator is not None:
+      raise ValueError("The vectorized evaluation needs every leaf, it is not available for a lazy tree")
+    return vectorized_value(self.leaves, self.branch_factor, self.expmax)
+
+  def successors(self, node):
+    if self.implicit:
+      first = node * self.branch_factor + 1
+      return range(first, first + self.branch_factor)
+    return node._successors
+
+  def is_terminal(self, node):
+    if self.implicit:
+      return node >= self._first_leaf
+    return node.depth == self.tree_depth-1
+
+  def utility(self, node):
+    self.leaves_evaluated += 1
+    if self.evaluator is not None:
+      return self.evaluator(node - self._first_leaf)
+    if self.implicit:
+      return self.leaves[node - self._first_leaf]
+    return node.value
+
+  def level_spec(self, depth):
+    """Spec of the nodes at `depth`"""
+    if depth % 2 == 0:
+      return 'Max'
+    return 'Min' if self.expmax == False else 'Expmax'
+
+  def spec(self, node):
+    if self.implicit:
+      return self.level_spec(bisect_right(self._level_start, node) - 1)
+    return node.spec
+
   def max_value(self, node:Node):
     v = -math.inf
-    for child in node._successors:
+    for child in self.successors(node):
       v = max(v, self.value(child))
     return v
 
   def min_value(self, node:Node):
     v = math.inf
-    for child in node._successors:
+    for child in self.successors(node):
       v = min(v, self.value(child))
     return v
 
   def expectimax(self, node:Node):
     v = 0
-    for child in node._successors:
+    for child in self.successors(node):
       p = 1 / self.branch_factor
       v += p * self.value(child)
     return v
 
   def value(self, node:Node):
-    if node.depth == self.tree_depth-1:
-      return node.value
+    self.nodes_visited += 1
+    if self.is_terminal(node):
+      return self.utility(node)
 
-    if node.spec == 'Min':
+    spec = self.spec(node)
+    if spec == 'Min':
       return self.min_value(node)
-    if node.spec == 'Expmax':
+    if spec == 'Expmax':
       return self.expectimax(node)
-    if node.spec == 'Max':
+    if spec == 'Max':
       return self.max_value(node)
 
 
 class MiniMaxAlphaBeta(MiniMax):
   
-  def __init__(self, branch_factor=None, term_nodes=None):
-    MiniMax.__init__(self, branch_factor, term_nodes)
+  def __init__(self, branch_factor=None, term_nodes=None, implicit=False, evaluator=None, depth=None):
+    MiniMax.__init__(self, branch_factor, term_nodes, implicit=implicit, evaluator=evaluator, depth=depth)
     
   def max_value(self, node:Node, alpha, beta):
     v = -math.inf
-    for child in node._successors:
+    for child in self.successors(node):
       v = max(v, self.value(child, alpha, beta))
       if v >= beta:
         return v
@@ -90,7 +218,7 @@ class MiniMaxAlphaBeta(MiniMax):
   
   def min_value(self, node:Node, alpha, beta):
     v = math.inf
-    for child in node._successors:
+    for child in self.successors(node):
       v = min(v, self.value(child, alpha, beta))
       if v <= alpha:
         return v
@@ -98,61 +226,608 @@ class MiniMaxAlphaBeta(MiniMax):
     return v
     
   def value(self, node:Node, alpha, beta):
-    if node.depth == self.tree_depth-1:
-      return node.value
+    self.nodes_visited += 1
+    if self.is_terminal(node):
+      return self.utility(node)
 
-    if node.spec == 'Min':
+    spec = self.spec(node)
+    if spec == 'Min':
       return self.min_value(node, alpha, beta)
-    if node.spec == 'Max':
+    if spec == 'Max':
       return self.max_value(node, alpha, beta)
 
 
-# some test cases
-random.seed(12)
-tn1 = [3, 12, 8, 2, 4, 6, 14, 5, 2]
-tn2 = [0, 40, 20, 30]
-tn2_sq = [x**2 for x in tn2]
+class ExpectiMiniMax(MiniMaxAlphaBeta):
+  """Expectiminimax with Star1/Star2 pruning at the chance nodes
+
+    The levels follow the pattern Max, Chance, Min, Chance, Max, ... A chance node averages its
+    children weighted by `probabilities`: a list of branch_factor probabilities shared by every
+    chance node or a callable returning the list of a given node, uniform by default.
+
+    Star1 gives every child of a chance node the window outside of which the chance node fails,
+    given the values of the children searched so far and the utility bounds `bounds`=(L, U) of
+    the others, so chance nodes get cutoffs like Max and Min nodes. Star2 first probes one
+    successor of every child, which bounds a Max child from below and a Min child from above:
+    the chance node may fail before any child is searched completely, otherwise the probed
+    bounds narrow the Star1 windows. pruning=None enumerates the whole tree.
+  """
+  SPECS = ('Max', 'Chance', 'Min', 'Chance')
+
+  def __init__(self, branch_factor=None, term_nodes=None, probabilities=None, bounds=None,
+               pruning='star2', implicit=False, evaluator=None, depth=None):
+    MiniMaxAlphaBeta.__init__(self, branch_factor, term_nodes, implicit=implicit, evaluator=evaluator, depth=depth)
+    if pruning not in (None, 'star1', 'star2'):
+      raise ValueError(f"Unknown pruning {pruning!r}, expected None, 'star1' or 'star2'")
+    self.pruning = pruning
+
+    if probabilities is None:
+      probabilities = [1 / branch_factor] * branch_factor
+    elif not callable(probabilities):
+      if len(probabilities) != branch_factor or not math.isclose(sum(probabilities), 1):
+        raise ValueError(f"Expected {branch_factor} probabilities summing to 1, got {probabilities}")
+    self._probabilities = probabilities
+
+    if bounds is None:
+      if term_nodes is None:
+        raise ValueError("A lazy tree needs the utility bounds")
+      bounds = (float(np.min(term_nodes)), float(np.max(term_nodes)))
+    self.lower, self.upper = bounds
+
+  def level_spec(self, depth):
+    return self.SPECS[depth % 4]
+
+  def probabilities(self, node):
+    if callable(self._probabilities):
+      return self._probabilities(node)
+    return self._probabilities
+
+  def value(self, node, alpha=-math.inf, beta=math.inf):
+    if not self.pruning:
+      alpha, beta = -math.inf, math.inf
+    if self.spec(node) == 'Chance' and not self.is_terminal(node):
+      self.nodes_visited += 1
+      return self.chance_value(node, alpha, beta)
+    return MiniMaxAlphaBeta.value(self, node, alpha, beta)
+
+  def chance_value(self, node, alpha, beta):
+    """Value of a chance node, or a bound of it beyond (alpha, beta) when it fails"""
+    children = list(self.successors(node))
+    probs = self.probabilities(node)
+    lo = [self.lower] * len(children)
+    hi = [self.upper] * len(children)
+    probed = [None] * len(children)
+    if self.pruning == 'star2':
+      bound = self.probe(children, probs, lo, hi, probed, alpha, beta)
+      if bound is not None:
+        return bound
+
+    # Star1: p_i * v_i plus the values searched so far plus the bounds of the rest of the children
+    rest_lo = sum(p * l for p, l in zip(probs, lo))
+    rest_hi = sum(p * h for p, h in zip(probs, hi))
+    if rest_lo >= beta:
+      return rest_lo
+    if rest_hi <= alpha:
+      return rest_hi
+    total = 0
+    for child, p, l, h, first in zip(children, probs, lo, hi, probed):
+      rest_lo -= p * l
+      rest_hi -= p * h
+      if p == 0:
+        continue
+      a = (alpha - total - rest_hi) / p
+      b = (beta - total - rest_lo) / p
+      if first is None:
+        v = self.value(child, max(a, l), min(b, h))
+      else:
+        v = self.resume(child, first, max(a, l), min(b, h))
+      total += p * v
+      if v <= a:
+        return total + rest_hi
+      if v >= b:
+        return total + rest_lo
+    return total
+
+  def probe(self, children, probs, lo, hi, probed, alpha, beta):
+    """Star2 probing phase, tightens the bounds `lo` and `hi` of the children in place
+
+      A probe that does not make the chance node fail is exact, its value goes to `probed` so
+      that the child is not searched again from its first successor.
+
+      Returns:
+        the bound of the chance node when the probes alone make it fail, None otherwise
+    """
+    sum_lo = sum(p * l for p, l in zip(probs, lo))
+    sum_hi = sum(p * h for p, h in zip(probs, hi))
+    for i, child in enumerate(children):
+      p = probs[i]
+      if p == 0 or self.is_terminal(child):
+        continue
+      first = next(iter(self.successors(child)))
+      # the windows reach the utility bounds, so a probe failing there is still exact
+      if self.spec(child) == 'Max':
+        b = (beta - sum_lo + p * lo[i]) / p
+        probed[i] = self.value(first, self.lower, min(b, self.upper))
+        v = max(probed[i], lo[i])
+        sum_lo += p * (v - lo[i])
+        lo[i] = v
+      else:
+        a = (alpha - sum_hi + p * hi[i]) / p
+        probed[i] = self.value(first, max(a, self.lower), self.upper)
+        v = min(probed[i], hi[i])
+        sum_hi += p * (v - hi[i])
+        hi[i] = v
+      if sum_lo >= beta:
+        return sum_lo
+      if sum_hi <= alpha:
+        return sum_hi
+    return None
+
+  def resume(self, node, v, alpha, beta):
+    """Alpha-beta search of a probed Max or Min node, `v` is the value of its first successor"""
+    self.nodes_visited += 1
+    children = iter(self.successors(node))
+    next(children)
+    if self.spec(node) == 'Max':
+      for child in children:
+        if v >= beta:
+          return v
+        alpha = max(alpha, v)
+        v = max(v, self.value(child, alpha, beta))
+      return v
+    for child in children:
+      if v <= alpha:
+        return v
+      beta = min(beta, v)
+      v = min(v, self.value(child, alpha, beta))
+    return v
+
 
-minimax = MiniMax(branch_factor=3, term_nodes=tn1, expmax=True)
-node = minimax.build_tree()
-print(minimax.value(node))
+class GameState:
+  """Interface of the game positions searched by `GameAlphaBeta`
 
-minimax = MiniMax(branch_factor=2, term_nodes=tn2_sq, expmax=True)
-node = minimax.build_tree()
-print(minimax.value(node))
+    `spec` is 'Max' or 'Min' like `Node.spec`, the player to move. Positions reached by
+    different move orders must have equal keys, e.g. Zobrist keys built with `ZobristHasher`.
+  """
+  spec = 'Max'
 
-minimax = MiniMaxAlphaBeta(branch_factor=3, term_nodes=tn1)
-node = minimax.build_tree()
-print(minimax.value(node, -math.inf, math.inf))
+  def successors(self):
+    """List of (move, state) pairs"""
+    raise NotImplementedError
 
+  def is_terminal(self):
+    raise NotImplementedError
 
-# Comparison between regular and alpha-beta pruned minimax
-regular_sc = 0
-alpha_beta_sc = 0
+  def utility(self):
+    """Value for Max, also used as static evaluation when the search reaches its depth limit"""
+    raise NotImplementedError
 
-for i in range(20):
+  def key(self):
+    """Hashable key of the position"""
+    raise NotImplementedError
+
+
+class ZobristHasher:
+  """Zobrist keys: a random 64 bit number per feature (e.g. a piece on a square), the key of a
+     position is the XOR of its features, so a move updates it by XOR-ing the changed features
+  """
+  def __init__(self, seed=0):
+    self._rng = random.Random(seed)
+    self._table = {}
+
+  def __getitem__(self, feature):
+    if feature not in self._table:
+      self._table[feature] = self._rng.getrandbits(64)
+    return self._table[feature]
+
+  def key(self, features):
+    key = 0
+    for feature in features:
+      key ^= self[feature]
+    return key
 
-  tic = perf_counter()
-  minimax = MiniMax(branch_factor=3, term_nodes=tn4)
-  node = minimax.build_tree()
-  minimax.value(node)
-  toc1 = perf_counter() - tic
-  print(f"{toc1:.5f}", end=' - ')
 
+class TreeState(GameState):
+  """`GameState` view of a node of a `MiniMax` tree (Node objects or implicit)"""
+
+  def __init__(self, tree, node):
+    self.tree = tree
+    self.node = node
+    self.spec = tree.spec(node)
+
+  def successors(self):
+    return [(i, TreeState(self.tree, child)) for i, child in enumerate(self.tree.successors(self.node))]
+
+  def is_terminal(self):
+    return self.tree.is_terminal(self.node)
+
+  def utility(self):
+    # internal nodes are evaluated by their leftmost leaf
+    node = self.node
+    while not self.tree.is_terminal(node):
+      node = next(iter(self.tree.successors(node)))
+    return self.tree.utility(node)
+
+  def key(self):
+    return self.node if self.tree.implicit else id(self.node)
+
+
+class NimState(GameState):
+  """Nim: players take any number of objects from one heap, taking the last object wins.
+     Taking from different heaps in a different order reaches the same position, so the
+     game tree is a DAG.
+  """
+
+  def __init__(self, heaps, spec='Max', hasher=None, _key=None):
+    self.heaps = tuple(heaps)
+    self.spec = spec
+    self.hasher = hasher if hasher is not None else ZobristHasher()
+    if _key is None:
+      _key = self.hasher.key((i, h) for i, h in enumerate(self.heaps)) ^ self.hasher[spec]
+    self._key = _key
+
+  def successors(self):
+    spec = 'Min' if self.spec == 'Max' else 'Max'
+    children = []
+    for i, heap in enumerate(self.heaps):
+      for take in range(1, heap + 1):
+        heaps = self.heaps[:i] + (heap - take,) + self.heaps[i+1:]
+        key = self._key ^ self.hasher[(i, heap)] ^ self.hasher[(i, heap - take)] \
+          ^ self.hasher[self.spec] ^ self.hasher[spec]
+        children.append(((i, take), NimState(heaps, spec, self.hasher, key)))
+    return children
+
+  def is_terminal(self):
+    return not any(self.heaps)
+
+  def utility(self):
+    if not self.is_terminal():
+      return 0
+    # the player to move has nothing left to take, the other one took the last object
+    return -1 if self.spec == 'Max' else 1
+
+  def key(self):
+    return self._key
+
+  def __repr__(self):
+    return f"NimState(heaps={self.heaps}, spec={self.spec})"
+
+
+EXACT, LOWER, UPPER = 'exact', 'lower', 'upper'
+
+
+class TranspositionTable:
+  """Bounded table of search results keyed by position key
+
+    Entries are (key, depth, value, bound, move), `bound` tells whether the value is EXACT, a
+    LOWER bound (the search failed high) or an UPPER bound (it failed low). Every index has two
+    slots: a depth-preferred one that keeps the deepest search, and an always-replace one for
+    the entries that are not deep enough to take it.
+  """
+
+  def __init__(self, size=2**16):
+    self.size = size
+    self._deep = [None] * size
+    self._recent = [None] * size
+    self.hits = 0
+
+  def lookup(self, key):
+    idx = hash(key) % self.size
+    for entry in (self._deep[idx], self._recent[idx]):
+      if entry is not None and entry[0] == key:
+        self.hits += 1
+        return entry
+    return None
+
+  def store(self, key, depth, value, bound, move=None):
+    idx = hash(key) % self.size
+    entry = (key, depth, value, bound, move)
+    deep = self._deep[idx]
+    if deep is None or deep[0] == key or depth >= deep[1]:
+      self._deep[idx] = entry
+      if self._recent[idx] is not None and self._recent[idx][0] == key:
+        self._recent[idx] = None
+    else:
+      self._recent[idx] = entry
+
+  def __len__(self):
+    return sum(entry is not None for entry in self._deep + self._recent)
+
+
+class GameAlphaBeta:
+  """Depth limited alpha-beta over `GameState` positions with a transposition table
+
+    A position searched before is not searched again when the stored result is deep enough:
+    an exact value is returned, a bound narrows the window. The stored best move is searched
+    first otherwise.
+  """
+
+  def __init__(self, table=None):
+    self.table = table if table is not None else TranspositionTable()
+    self.nodes_visited = 0
+
+  def value(self, state:GameState, depth, alpha=-math.inf, beta=math.inf):
+    self.nodes_visited += 1
+    if depth == 0 or state.is_terminal():
+      return state.utility()
+
+    key = state.key()
+    entry = self.table.lookup(key)
+    tt_move = None
+    if entry is not None:
+      _, entry_depth, entry_value, bound, tt_move = entry
+      if entry_depth >= depth:
+        if bound == EXACT:
+          return entry_value
+        if bound == LOWER:
+          alpha = max(alpha, entry_value)
+        else:
+          beta = min(beta, entry_value)
+        if alpha >= beta:
+          return entry_value
+
+    v, move = self.search_children(state, self.order(state, tt_move, depth), depth, alpha, beta)
+
+    if v <= alpha:
+      bound = UPPER
+    elif v >= beta:
+      bound = LOWER
+    else:
+      bound = EXACT
+    self.table.store(key, depth, v, bound, move)
+    return v
+
+  def order(self, state, tt_move, depth):
+    """Successors of the state with the move from the transposition table first"""
+    children = state.successors()
+    if tt_move is not None:
+      children.sort(key=lambda child: child[0] != tt_move)
+    return children
+
+  def search_children(self, state, children, depth, alpha, beta):
+    """Returns (value, best move)"""
+    best = None
+    if state.spec == 'Max':
+      v = -math.inf
+      for move, child in children:
+        child_value = self.value(child, depth - 1, alpha, beta)
+        if child_value > v:
+          v, best = child_value, move
+        if v >= beta:
+          self.cutoff(move, depth)
+          break
+        alpha = max(alpha, v)
+    else:
+      v = math.inf
+      for move, child in children:
+        child_value = self.value(child, depth - 1, alpha, beta)
+        if child_value < v:
+          v, best = child_value, move
+        if v <= alpha:
+          self.cutoff(move, depth)
+          break
+        beta = min(beta, v)
+    return (v, best)
+
+  def cutoff(self, move, depth):
+    """Called with the move that caused a cutoff, used by move ordering heuristics"""
+    pass
+
+  def best_move(self, state:GameState, depth):
+    """Returns (move, value) of the root position"""
+    v = self.value(state, depth)
+    entry = self.table.lookup(state.key())
+    return (entry[4] if entry is not None else None, v)
+
+
+class SearchTimeout(Exception):
+  """Raised inside the search when the time budget of `IterativeDeepening` runs out"""
+
+
+class IterativeDeepening(GameAlphaBeta):
+  """Iterative deepening alpha-beta with move ordering and a wall-clock budget
+
+    Searches depth 1, 2, ... The transposition table keeps the best move of the previous
+    iteration, which is searched first. The other moves are ordered by killer moves (moves that
+    caused a cutoff at the same ply) and the history heuristic (cutoffs weighted by depth**2).
+    When the budget runs out the best move of the last completed depth is returned.
+  """
+
+  def __init__(self, table=None, n_killers=2, check_every=1024):
+    GameAlphaBeta.__init__(self, table)
+    self.n_killers = n_killers
+    self.check_every = check_every
+    self.killers = {}
+    self.history = {}
+    self.deadline = None
+    self._root_depth = 0
+    self._horizon = False
+
+  def search(self, state:GameState, max_depth=64, time_budget=None):
+    """Returns (best move, value, report), the report has a dict per completed depth with
+       the nodes searched, the effective branching factor nodes**(1/depth) and the time"""
+    tic = perf_counter()
+    self.deadline = tic + time_budget if time_budget is not None else None
+    best_move, best_value, report = None, None, []
+
+    for depth in range(1, max_depth + 1):
+      self._root_depth = depth
+      self._horizon = False
+      nodes = self.nodes_visited
+      try:
+        v = self.value(state, depth)
+      except SearchTimeout:
+        break
+      nodes = self.nodes_visited - nodes
+      entry = self.table.lookup(state.key())
+      best_move, best_value = (entry[4] if entry is not None else None), v
+      report.append({
+        'depth': depth,
+        'value': v,
+        'move': best_move,
+        'nodes': nodes,
+        'ebf': nodes ** (1 / depth),
+        'seconds': perf_counter() - tic,
+      })
+      # the whole game tree fit in this depth, deeper searches give the same answer
+      if not self._horizon:
+        break
+
+    if best_move is None and not state.is_terminal():
+      best_move = state.successors()[0][0]
+    self.deadline = None
+    return (best_move, best_value, report)
+
+  def value(self, state:GameState, depth, alpha=-math.inf, beta=math.inf):
+    if self.deadline is not None and self.nodes_visited % self.check_every == 0 \
+        and perf_counter() > self.deadline:
+      raise SearchTimeout
+    if depth == 0 and not state.is_terminal():
+      self._horizon = True
+    return GameAlphaBeta.value(self, state, depth, alpha, beta)
+
+  def order(self, state, tt_move, depth):
+    killers = self.killers.get(self._root_depth - depth, [])
+
+    def score(child):
+      move = child[0]
+      if move == tt_move:
+        return (0, 0)
+      if move in killers:
+        return (1, killers.index(move))
+      return (2, -self.history.get(move, 0))
+
+    return sorted(state.successors(), key=score)
+
+  def cutoff(self, move, depth):
+    killers = self.killers.setdefault(self._root_depth - depth, [])
+    if move not in killers:
+      killers.insert(0, move)
+      del killers[self.n_killers:]
+    self.history[move] = self.history.get(move, 0) + depth * depth
+
+
+# state of the worker processes of `parallel_alpha_beta`
+_worker = {}
+
+
+def _init_worker(tree, alpha):
+  _worker['tree'] = tree
+  _worker['alpha'] = alpha
+
+
+def _search_root_child(child):
+  """Searches a Min child of the root, re-reading the shared alpha before every grandchild so
+     that a better root move found by another worker cuts this one off early"""
+  tree, shared = _worker['tree'], _worker['alpha']
+  tree.leaves_evaluated = 0
+  v = math.inf
+  for grandchild in tree.successors(child):
+    alpha = shared.value
+    if tree.is_terminal(grandchild):
+      v = min(v, tree.utility(grandchild))
+    else:
+      v = min(v, tree.value(grandchild, alpha, v))
+    if v <= alpha:
+      break
+  with shared.get_lock():
+    if v > shared.value:
+      shared.value = v
+  return (child, v, tree.leaves_evaluated)
+
+
+def parallel_alpha_beta(tree, workers=None):
+  """Young Brothers Wait alpha-beta, split at the root over a process pool
+
+    The eldest child of the root is searched serially to establish alpha. Its younger brothers
+    are then searched in parallel with the shared alpha, which each worker raises as soon as it
+    finds a better move. Values of the children that fail low are only upper bounds, but they
+    never beat the best move, so the root value is exact.
+
+    Args:
+      tree (MiniMaxAlphaBeta): implicit tree (leaves array or picklable evaluator), Max at the root
+      workers (int): size of the process pool, all cores by default
+
+    Returns:
+      (value, best child, leaves evaluated)
+  """
+  if not tree.implicit:
+    raise ValueError("parallel_alpha_beta needs an implicit tree")
+  root = tree.build_tree()
+  children = list(tree.successors(root))
+  tree.leaves_evaluated = 0
+
+  if tree.tree_depth <= 2:
+    # the children are leaves, nothing worth sending to other processes
+    values = [tree.utility(child) for child in children]
+    v = max(values)
+    return (v, children[values.index(v)], tree.leaves_evaluated)
+
+  eldest = children[0]
+  alpha = tree.value(eldest, -math.inf, math.inf)
+  best, leaves = eldest, tree.leaves_evaluated
+
+  shared = multiprocessing.Value('d', alpha)
+  with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(tree, shared)) as pool:
+    for child, v, evaluated in pool.imap_unordered(_search_root_child, children[1:]):
+      leaves += evaluated
+      if v > alpha:
+        alpha, best = v, child
+  return (alpha, best, leaves)
+
+
+def speedup_report(branch_factor=10, depth=7, cores=None, seed=0):
+  """Times `parallel_alpha_beta` against the serial `MiniMaxAlphaBeta` on a random tree
+
+    Returns:
+      list of dicts with the cores, serial and parallel seconds, speedup and leaves evaluated
+  """
+  if cores is None:
+    cores = sorted({1, 2, 4, multiprocessing.cpu_count()})
+  leaves = np.random.default_rng(seed).random(branch_factor ** (depth - 1))
+
+  tree = MiniMaxAlphaBeta(branch_factor, leaves, implicit=True)
   tic = perf_counter()
-  minimax = MiniMaxAlphaBeta(branch_factor=3, term_nodes=tn4)
+  serial_value = tree.value(tree.build_tree(), -math.inf, math.inf)
+  serial = perf_counter() - tic
+  serial_leaves = tree.leaves_evaluated
+
+  report = []
+  for n in cores:
+    tree = MiniMaxAlphaBeta(branch_factor, leaves, implicit=True)
+    tic = perf_counter()
+    value, _, evaluated = parallel_alpha_beta(tree, workers=n)
+    toc = perf_counter() - tic
+    if value != serial_value:
+      raise RuntimeError(f"The parallel search with {n} workers found {value}, the serial one {serial_value}")
+    report.append({
+      'cores': n,
+      'serial_seconds': serial,
+      'parallel_seconds': toc,
+      'speedup': serial / toc,
+      'serial_leaves': serial_leaves,
+      'parallel_leaves': evaluated,
+    })
+  return report
+
+
+if __name__ == "__main__":
+  # some test cases, see adversarial_benchmark.py for the MiniMax vs MiniMaxAlphaBeta comparison
+  tn1 = [3, 12, 8, 2, 4, 6, 14, 5, 2]
+  tn2 = [0, 40, 20, 30]
+  tn2_sq = [x**2 for x in tn2]
+
+  minimax = MiniMax(branch_factor=3, term_nodes=tn1, expmax=True)
   node = minimax.build_tree()
-  minimax.value(node, -math.inf, math.inf)
-  toc2 = perf_counter() - tic
-  print(f"{toc2:.5f}", end=' - ')
-
-  if toc2 < toc1:
-    alpha_beta_sc += 1
-    print("Alpha-beta pruning wins")
-  else:
-    regular_sc += 1
-    print("Regualar minimax wins")
+  print(minimax.value(node))
 
-print(f"{regular_sc=}, {alpha_beta_sc=}")
+  minimax = MiniMax(branch_factor=2, term_nodes=tn2_sq, expmax=True)
+  node = minimax.build_tree()
+  print(minimax.value(node))
 
+  minimax = MiniMaxAlphaBeta(branch_factor=3, term_nodes=tn1)
+  node = minimax.build_tree()
+  print(minimax.value(node, -math.inf, math.inf))
 
+  minimax = ExpectiMiniMax(branch_factor=3, term_nodes=tn1 * 3, probabilities=[0.5, 0.3, 0.2])
+  node = minimax.build_tree()
+  print(minimax.value(node))
@@ -0,0 +1,180 @@
+"""Best-first search core shared by the A* solvers
+
+`BestFirstSearch` runs A* over any state space given as callables: the successors of a state, the
+heuristic, the goal test and an `encode` function that turns a state into the hashable key of the
+closed set. The open list is a `BucketQueue`, which suits the small integer (or half-integer)
+f-values of puzzle searches, and ties on f go to the deeper state.
+
+  search = BestFirstSearch(successors, heuristic, is_goal, encode=tuple, max_nodes=10 ** 4)
+  goal = search.search(start)
+  if goal is not None:
+    print(search.cost(goal), search.path(goal))
+"""
+import heapq
+from time import perf_counter
+
+
+class BucketQueue:
+  """Open list with one bucket of items per (f, g) pair and a heap of the distinct pairs
+
+    Few distinct f-values are shared by many states when the step costs are small integers, so a
+    push or a pop is a list append or pop and the heap only orders the pairs. Among the items of
+    the lowest f the deepest (largest g) comes first with `deeper_first`, the shallowest
+    otherwise, and within a bucket the last pushed.
+  """
+
+  def __init__(self, deeper_first=True):
+    self.sign = -1 if deeper_first else 1
+    self.buckets = {}
+    self.keys = []
+    self.size = 0
+
+  def __len__(self):
+    return self.size
+
+  def push(self, f, g, item):
+    key = (f, self.sign * g)
+    bucket = self.buckets.get(key)
+    if bucket is None:
+      bucket = self.buckets[key] = []
+      heapq.heappush(self.keys, key)
+    bucket.append(item)
+    self.size += 1
+
+  def pop(self):
+    """Returns (f, g, item) of the first item"""
+    key = self.keys[0]
+    bucket = self.buckets[key]
+    item = bucket.pop()
+    if not bucket:
+      del self.buckets[key]
+      heapq.heappop(self.keys)
+    self.size -= 1
+    return (key[0], self.sign * key[1], item)
+
+
+class BestFirstSearch:
+  """A* search with a hash closed set, reopening and node and time budgets
+
+    Args:
+      successors (callable): state -> iterable of the next states, one step each, or of
+        (next state, step cost) pairs with `weighted`
+      heuristic (callable): state -> estimated cost from the state to a goal
+      is_goal (callable): state -> whether the state is a goal, tested when it is generated. The
+        cheapest goal found is returned once no state on the open list has a lower f, so a goal
+        generated early ends the search without expanding the plateau of states of its f.
+      encode (callable): state -> hashable key of the state, the state itself by default
+      weighted (bool): the successors come with their step costs
+      reopen (bool): expand again a closed state reached later by a cheaper path, which keeps A*
+        optimal when the heuristic is admissible but not consistent. Without it a state is
+        expanded once.
+      deeper_first (bool): ties on f go to the state with the larger g
+      max_nodes (int): give up after expanding that many states
+      max_seconds (float): give up after that many seconds
+
+    After `search`:
+      status (str): 'found' (the goal returned is the cheapest), 'exhausted' (no goal can be
+        reached), 'node_budget' or 'time_budget'
+      nodes (dict): key -> (g, parent key, state) of the cheapest path found to the state, one
+        entry per state since hashing large states dominates the cost of a search
+      closed (dict): key -> cost of the state when it was last expanded
+      expanded, generated, reopened (int): states expanded, pushed on the open list and expanded
+        again
+      seconds (float): time of the search
+  """
+
+  def __init__(self, successors, heuristic, is_goal, encode=None, weighted=False, reopen=True,
+               deeper_first=True, max_nodes=None, max_seconds=None):
+    self.successors = successors
+    self.heuristic = heuristic
+    self.is_goal = is_goal
+    self.encode = encode if encode is not None else (lambda state: state)
+    self.weighted = weighted
+    self.reopen = reopen
+    self.deeper_first = deeper_first
+    self.max_nodes = max_nodes
+    self.max_seconds = max_seconds
+    self.reset()
+
+  def reset(self):
+    self.status = None
+    self.nodes = {}
+    self.closed = {}
+    self.expanded = 0
+    self.generated = 0
+    self.reopened = 0
+    self.seconds = 0.0
+
+  def search(self, start):
+    """Returns the cheapest goal state found, or None when no goal state was generated
+
+      When a budget stops the search, the cheapest goal generated so far is returned, it may not
+      be the cheapest one and `status` tells the budget.
+    """
+    self.reset()
+    tic = perf_counter()
+    encode, heuristic, is_goal = self.encode, self.heuristic, self.is_goal
+    nodes, closed = self.nodes, self.closed
+
+    key = encode(start)
+    nodes[key] = (0, None, start)
+    open_list = BucketQueue(self.deeper_first)
+    open_list.push(heuristic(start), 0, key)
+    self.generated = 1
+
+    self.status = 'exhausted'
+    goal_key = key if is_goal(start) else None
+    while open_list:
+      if self.max_nodes is not None and self.expanded >= self.max_nodes:
+        self.status = 'node_budget'
+        break
+      # the clock is read every 256 expansions
+      if self.max_seconds is not None and not self.expanded & 255 and perf_counter() - tic > self.max_seconds:
+        self.status = 'time_budget'
+        break
+
+      f, g, key = open_list.pop()
+      if goal_key is not None and f >= nodes[goal_key][0]:
+        break
+      # stale entry: the state was pushed again with a lower g, or expanded with it already
+      best, _, state = nodes[key]
+      if g > best:
+        continue
+      if key in closed:
+        if closed[key] <= g:
+          continue
+        self.reopened += 1
+      closed[key] = g
+      self.expanded += 1
+
+      for item in self.successors(state):
+        next_state, cost = item if self.weighted else (item, 1)
+        next_key = encode(next_state)
+        next_g = g + cost
+        known = nodes.get(next_key)
+        if known is not None and (next_g >= known[0] or not self.reopen and next_key in closed):
+          continue
+        nodes[next_key] = (next_g, key, next_state)
+        open_list.push(next_g + heuristic(next_state), next_g, next_key)
+        self.generated += 1
+        if next_key != goal_key and is_goal(next_state) and (goal_key is None or next_g < nodes[goal_key][0]):
+          goal_key = next_key
+
+    self.seconds = perf_counter() - tic
+    if goal_key is None:
+      return None
+    if self.status == 'exhausted':
+      self.status = 'found'
+    return nodes[goal_key][2]
+
+  def cost(self, state):
+    return self.nodes[self.encode(state)][0]
+
+  def path(self, state):
+    """States from the start to `state` along the cheapest path found"""
+    path = []
+    key = self.encode(state)
+    while key is not None:
+      _, key, state = self.nodes[key]
+      path.append(state)
+    return path[::-1]
@@ -0,0 +1,153 @@
+"""Benchmark of the letter grid solvers across grid sizes and clue densities
+
+Generates `--puzzles` seeded puzzles for every grid size N and clue density (the fraction of the
+N * N cells revealed) and runs `backtracking_search` of every solver on them, each run in a worker
+process stopped after `--timeout` seconds. Records the solve times, backtracks and AC-3 arc
+revisions (only `main.LetterGridSolver` runs AC-3) and checks every solution: every generated
+puzzle has one, so no solution or a wrong one counts as invalid. A solver that times out on all
+the puzzles of a density is not run on the larger grids of that density: it is past its
+exponential wall.
+
+  python benchmark.py                                   # table of the default grid
+  python benchmark.py -n 5 6 7 -d 0.1 0.2 --solvers bitgrid hamiltonian --json
+"""
+import argparse
+import json
+import multiprocessing
+import statistics
+import sys
+from time import perf_counter
+
+# import helper functions
+from helpers import get_alphabet
+from bitgrid import BitGridSolver
+from generator import make_puzzle
+from hamiltonian import HamiltonianGridSolver
+from main import LetterGridSolver
+
+SOLVERS = {
+    'csp': LetterGridSolver,
+    'bitgrid': BitGridSolver,
+    'hamiltonian': HamiltonianGridSolver,
+}
+
+
+def is_valid(solution, clues, n):
+    """Whether the solution keeps the clues and puts consecutive letters on adjacent cells"""
+    alphabet = get_alphabet(n * n)
+    cells = {letter: cell for cell, letter in solution.items()}
+    if len(cells) != n * n or any(solution.get(cell) != letter for cell, letter in clues.items()):
+        return False
+    return all(abs(cells[a][0] - cells[b][0]) + abs(cells[a][1] - cells[b][1]) == 1
+               for a, b in zip(alphabet, alphabet[1:]))
+
+
+def run_solver(job):
+    """Solves one puzzle, returns (seconds, status, backtracks, revisions)"""
+    solver, clues, n = job
+    tic = perf_counter()
+    problem = SOLVERS[solver](clues, n)
+    solution = problem.backtracking_search()
+    seconds = perf_counter() - tic
+    if solution is None:
+        status = 'unsolvable'
+    else:
+        status = 'solved' if is_valid(solution, clues, n) else 'invalid'
+    return (seconds, status, problem.backtracks, getattr(problem, 'revisions', None))
+
+
+def run_with_timeout(pool, job, timeout):
+    """
+    Runs the job in the single worker of the pool.
+
+    Returns:
+      (result, pool): result is None on a timeout, the worker is then killed and a new pool is
+        returned to go on with
+    """
+    try:
+        return (pool.apply_async(run_solver, (job,)).get(timeout), pool)
+    except multiprocessing.TimeoutError:
+        pool.terminate()
+        pool.join()
+        return (None, multiprocessing.Pool(1))
+
+
+def mean(values):
+    return statistics.mean(values) if values else None
+
+
+def run(sizes, densities, solvers=list(SOLVERS), puzzles=5, timeout=10.0, seed=0, unique=False):
+    records = []
+    pool = multiprocessing.Pool(1)
+    try:
+        for density in densities:
+            walled = set()
+            for n in sizes:
+                k = max(1, round(density * n * n))
+                jobs = [make_puzzle(n, k, seed + i, unique)[0] for i in range(puzzles)]
+                for solver in solvers:
+                    if solver in walled:
+                        continue
+                    runs = []
+                    for clues in jobs:
+                        result, pool = run_with_timeout(pool, (solver, clues, n), timeout)
+                        runs.append(result)
+                    done = [r for r in runs if r is not None]
+                    if not done:
+                        walled.add(solver)
+                    records.append({
+                        'n': n,
+                        'density': density,
+                        'clues': mean([len(clues) for clues in jobs]),
+                        'solver': solver,
+                        'puzzles': puzzles,
+                        'solved': sum(r[1] == 'solved' for r in done),
+                        'invalid': sum(r[1] != 'solved' for r in done),
+                        'timeouts': len(runs) - len(done),
+                        'seconds': mean([r[0] for r in done]),
+                        'max_seconds': max((r[0] for r in done), default=None),
+                        'backtracks': mean([r[2] for r in done]),
+                        'revisions': mean([r[3] for r in done if r[3] is not None]),
+                    })
+    finally:
+        pool.terminate()
+    return records
+
+
+def print_table(records):
+    def cell(value, fmt):
+        return '-' if value is None else format(value, fmt)
+
+    print(f"{'n':>3}{'density':>8}{'clues':>7} {'solver':<12}{'solved':>7}{'timeouts':>9}{'invalid':>8}"
+          f"{'mean [s]':>10}{'max [s]':>9}{'backtracks':>12}{'revisions':>11}")
+    for r in records:
+        print(f"{r['n']:>3}{r['density']:>8.2f}{r['clues']:>7.1f} {r['solver']:<12}{r['solved']:>7}"
+              f"{r['timeouts']:>9}{r['invalid']:>8}{cell(r['seconds'], '.3f'):>10}"
+              f"{cell(r['max_seconds'], '.3f'):>9}{cell(r['backtracks'], '.0f'):>12}{cell(r['revisions'], '.0f'):>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('-n', '--sizes', type=int, nargs='+', default=[4, 5, 6, 7, 8], help='sizes N of the grids')
+    parser.add_argument('-d', '--densities', type=float, nargs='+', default=[0.1, 0.2, 0.3],
+                        help='fractions of the cells revealed as clues')
+    parser.add_argument('--solvers', nargs='+', choices=list(SOLVERS), default=list(SOLVERS))
+    parser.add_argument('--puzzles', type=int, default=5, help='puzzles of every size and density')
+    parser.add_argument('--timeout', type=float, default=10.0, help='seconds before a run is stopped')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--unique', action='store_true', help='generate puzzles with a single solution')
+    parser.add_argument('--json', action='store_true', help='print JSON records instead of a table')
+    args = parser.parse_args()
+
+    records = run(args.sizes, args.densities, args.solvers, args.puzzles, args.timeout, args.seed,
+                  args.unique)
+    if args.json:
+        json.dump(records, sys.stdout, indent=2)
+        print()
+    else:
+        print_table(records)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
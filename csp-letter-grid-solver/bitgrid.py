@@ -0,0 +1,213 @@
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# import helper functions
+from helpers import get_alphabet, get_grid, get_size, print_grid
+
+
+def popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+def bits(mask: int):
+    """Yields the indexes of the set bits of the mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class BitGridSolver:
+    """
+    Compact engine for the letter grid on an N x N grid with N * N letters.
+
+    Cells are numbered row by row from 0 and letters by their position in the alphabet. The
+    domain of a cell is an integer whose bit l is set while letter l is still possible, and
+    the tables below are computed once, so that constraint checks are bitwise operations:
+    - `neighbors[c]` lists the indexes of the cells next to cell c, `neighbor_mask[c]` is the
+      same as a bitmask of cells
+    - `letter_adjacent[l]` is the bitmask of the letters l - 1 and l + 1
+
+    Placing letter l on cell c removes l from every other domain, and the adjacent letters of l
+    not placed yet from every cell that is not next to c. Every domain change is pushed on
+    `trail` and undone on backtrack.
+    """
+
+    def __init__(self, grid: Dict[Tuple[int, int], str], n: int = 5):
+        self.n = n
+        self.n_cells = n * n
+        self.alphabet = get_alphabet(self.n_cells)
+        self.letter_index = {letter: i for i, letter in enumerate(self.alphabet)}
+
+        self.neighbors = []
+        for cell in range(self.n_cells):
+            row, col = divmod(cell, n)
+            around = ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+            self.neighbors.append([r * n + c for r, c in around if 0 <= r < n and 0 <= c < n])
+        self.neighbor_mask = [sum(1 << d for d in neighs) for neighs in self.neighbors]
+        self.full = (1 << self.n_cells) - 1
+        self.letter_adjacent = [((1 << l) >> 1 | (1 << l) << 1) & self.full for l in range(self.n_cells)]
+
+        self.domain = [self.full] * self.n_cells
+        self.cell_letter = [-1] * self.n_cells
+        self.letter_cell = [-1] * self.n_cells
+        self.placed = 0
+        self.n_assigned = 0
+        self.trail = []
+        self.backtracks = 0
+
+        # the clues are assigned like any other value, False if they contradict each other
+        self.consistent = True
+        for (row, col), letter in grid.items():
+            cell = (row - 1) * n + col - 1
+            l = self.letter_index[letter]
+            if not self.domain[cell] >> l & 1 or not self.assign(cell, l):
+                self.consistent = False
+                break
+
+    def remove(self, cell: int, mask: int) -> bool:
+        """Removes the letters of `mask` from the domain of `cell`, False on a wipeout"""
+        domain = self.domain[cell]
+        if domain & mask:
+            self.trail.append((cell, domain))
+            domain &= ~mask
+            self.domain[cell] = domain
+        return domain != 0
+
+    def assign(self, cell: int, letter: int) -> bool:
+        """
+        Places the letter and propagates it.
+        Returns False when a domain is wiped out or a constraint cannot be satisfied anymore.
+        """
+        self.trail.append((cell, self.domain[cell]))
+        self.domain[cell] = 1 << letter
+        self.cell_letter[cell] = letter
+        self.letter_cell[letter] = cell
+        self.placed |= 1 << letter
+        self.n_assigned += 1
+        return self.propagate(cell, letter)
+
+    def undo(self, mark: int):
+        while len(self.trail) > mark:
+            cell, domain = self.trail.pop()
+            # domains only shrink while a cell is free, so the entry of an assigned cell is the
+            # one recorded by its assignment
+            letter = self.cell_letter[cell]
+            if letter >= 0:
+                self.cell_letter[cell] = -1
+                self.letter_cell[letter] = -1
+                self.placed &= ~(1 << letter)
+                self.n_assigned -= 1
+            self.domain[cell] = domain
+
+    def propagate(self, cell: int, letter: int) -> bool:
+        bit = 1 << letter
+        # the adjacent letters not placed yet have to go next to `cell`
+        far = self.letter_adjacent[letter] & ~self.placed
+        near = self.neighbor_mask[cell]
+        room = 0
+        for other in range(self.n_cells):
+            if self.cell_letter[other] >= 0:
+                continue
+            mask = bit if near >> other & 1 else bit | far
+            if not self.remove(other, mask):
+                return False
+            room |= self.domain[other]
+        # every letter not placed yet still needs a free cell
+        if self.full & ~self.placed & ~room:
+            return False
+
+        for other in [cell] + self.neighbors[cell]:
+            if self.cell_letter[other] >= 0 and not self.satisfiable(other):
+                return False
+        return True
+
+    def satisfiable(self, cell: int) -> bool:
+        """Whether the letters adjacent to the letter of `cell` can still be next to it"""
+        around = 0
+        room = 0
+        n_free = 0
+        for other in self.neighbors[cell]:
+            if self.cell_letter[other] >= 0:
+                around |= 1 << self.cell_letter[other]
+            else:
+                room |= self.domain[other]
+                n_free += 1
+        need = self.letter_adjacent[self.cell_letter[cell]] & ~around
+        # a missing letter placed elsewhere is not next to the cell, one still free needs a
+        # free neighbor that can take it
+        return not need & self.placed and not need & ~room and popcount(need) <= n_free
+
+    def select_unassigned_variable(self) -> int:
+        """MRV: the free cell with the fewest letters left, ties to the most assigned neighbors"""
+        best, best_key = -1, None
+        for cell in range(self.n_cells):
+            if self.cell_letter[cell] < 0:
+                key = (popcount(self.domain[cell]),
+                       -sum(self.cell_letter[other] >= 0 for other in self.neighbors[cell]))
+                if best_key is None or key < best_key:
+                    best, best_key = cell, key
+        return best
+
+    def letter_cells(self) -> List[int]:
+        """Bitmask of the free cells each letter can still go to"""
+        cells = [0] * self.n_cells
+        for cell in range(self.n_cells):
+            if self.cell_letter[cell] < 0:
+                for letter in bits(self.domain[cell]):
+                    cells[letter] |= 1 << cell
+        return cells
+
+    def order_values(self, cell: int) -> List[int]:
+        """The letters adjacent to the letters of the neighbors first, like `sort_values`"""
+        prefer = 0
+        for other in self.neighbors[cell]:
+            if self.cell_letter[other] >= 0:
+                prefer |= self.letter_adjacent[self.cell_letter[other]]
+        domain = self.domain[cell]
+        return list(bits(domain & prefer)) + list(bits(domain & ~prefer))
+
+    def choices(self) -> List[Tuple[int, int]]:
+        """
+        (cell, letter) pairs to branch on: the values of the MRV cell, or the cells of the letter
+        with fewer cells left when there is one, since every letter has to go somewhere.
+        """
+        cell = self.select_unassigned_variable()
+        n_letters = popcount(self.domain[cell])
+        if n_letters > 1:
+            cells = self.letter_cells()
+            letter = min((l for l in range(self.n_cells) if not self.placed >> l & 1),
+                         key=lambda l: popcount(cells[l]))
+            if popcount(cells[letter]) < n_letters:
+                return [(other, letter) for other in bits(cells[letter])]
+        return [(cell, letter) for letter in self.order_values(cell)]
+
+    def backtrack(self) -> bool:
+        if self.n_assigned == self.n_cells:
+            return True
+
+        for cell, letter in self.choices():
+            mark = len(self.trail)
+            if self.assign(cell, letter) and self.backtrack():
+                return True
+            self.undo(mark)
+            self.backtracks += 1
+        return False
+
+    def backtracking_search(self) -> Optional[Dict[Tuple[int, int], str]]:
+        """Returns the filled grid {(row, col): letter}, or None if there is no solution"""
+        if not self.consistent or not self.backtrack():
+            return None
+        return {(cell // self.n + 1, cell % self.n + 1): self.alphabet[letter]
+                for cell, letter in enumerate(self.cell_letter)}
+
+
+if __name__ == "__main__":
+    file_path = sys.argv[1] if len(sys.argv) > 1 else "input.txt"
+    n = get_size(file_path)
+    solver = BitGridSolver(get_grid(file_path), n)
+    solution = solver.backtracking_search()
+    if solution is not None:
+        print_grid([(i, j) for i in range(1, n + 1) for j in range(1, n + 1)], solution, n)
+    else:
+        print("No solution found.")
@@ -0,0 +1,106 @@
+"""Seeded generator of letter grid puzzles
+
+A puzzle is a random Hamiltonian path through the N x N grid, the snake of letters, with k of
+its letters revealed as clues. The files are written in the format of `input.txt` and read back
+by `helpers.get_grid`.
+
+  python generator.py -n 6 -k 8 --seed 3                  # print a puzzle
+  python generator.py -n 7 -k 10 --unique -o puzzle.txt   # write a puzzle with a single solution
+"""
+import argparse
+import random
+import sys
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+# import helper functions
+from helpers import get_alphabet
+from hamiltonian import HamiltonianGridSolver
+
+
+def snake_path(n: int, rng: random.Random, moves: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Random Hamiltonian path of the n x n grid, the (row, col) cells from 1 in path order.
+
+    Starts from the path that zigzags row by row and applies `moves` (10 per cell by default)
+    backbite moves: one end of the path steps to a neighbor cell, which is on the path, and the
+    part of the path between them is reversed so that it stays a Hamiltonian path.
+    """
+    path = [(row, col if row % 2 == 0 else n - 1 - col) for row in range(n) for col in range(n)]
+    if moves is None:
+        moves = 10 * n * n
+    for _ in range(moves if n > 1 else 0):
+        if rng.random() < 0.5:
+            path.reverse()
+        # the end is path[-1], it moves to the neighbor and the path after the neighbor turns around
+        row, col = path[-1]
+        around = [(r, c) for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+                  if 0 <= r < n and 0 <= c < n]
+        i = path.index(rng.choice(around))
+        if i != len(path) - 2:
+            path[i + 1:] = path[:i:-1]
+    return [(row + 1, col + 1) for row, col in path]
+
+
+def make_puzzle(n: int, k: int, seed: Optional[int] = None, unique: bool = False
+                ) -> Tuple[Dict[Tuple[int, int], str], Dict[Tuple[int, int], str]]:
+    """
+    Reveals k random letters of a random snake.
+    With `unique`, more letters of the snake are revealed until it is the only solution: each time
+    a cell where another solution differs from it.
+
+    Returns:
+      (clues, solution): {(row, col): letter} of the clues and of the whole snake
+    """
+    rng = random.Random(seed)
+    alphabet = get_alphabet(n * n)
+    solution = {cell: alphabet[i] for i, cell in enumerate(snake_path(n, rng))}
+    cells = sorted(solution)
+    clues = {cell: solution[cell] for cell in rng.sample(cells, min(k, len(cells)))}
+
+    while unique:
+        others = [other for other in islice(HamiltonianGridSolver(clues, n).solutions(), 2)
+                  if other != solution]
+        if not others:
+            break
+        differ = [cell for cell in cells if others[0][cell] != solution[cell]]
+        cell = rng.choice(differ)
+        clues[cell] = solution[cell]
+    return (clues, solution)
+
+
+def format_grid(clues: Dict[Tuple[int, int], str], n: int) -> str:
+    """The grid in the format of `input.txt`, "-" on the empty cells"""
+    return "\n".join("    ".join(clues.get((row, col), "-") for col in range(1, n + 1))
+                     for row in range(1, n + 1)) + "\n"
+
+
+def write_puzzle(file_path: str, clues: Dict[Tuple[int, int], str], n: int):
+    with open(file_path, "w") as f:
+        f.write(format_grid(clues, n))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-n", type=int, default=5, help="size of the grid")
+    parser.add_argument("-k", "--clues", type=int, default=5, help="number of revealed letters")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--unique", action="store_true",
+                        help="reveal more letters until the puzzle has a single solution")
+    parser.add_argument("-o", "--output", help="file to write the puzzle to, printed otherwise")
+    parser.add_argument("--solution", action="store_true", help="print the solution too")
+    args = parser.parse_args()
+
+    clues, solution = make_puzzle(args.n, args.clues, args.seed, args.unique)
+    if args.output:
+        write_puzzle(args.output, clues, args.n)
+    else:
+        print(format_grid(clues, args.n), end="")
+    if args.solution:
+        print()
+        print(format_grid(solution, args.n), end="")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
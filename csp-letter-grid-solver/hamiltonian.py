@@ -0,0 +1,348 @@
+import random
+import sys
+from bisect import bisect_left, insort
+from collections import deque
+from itertools import permutations
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# import helper functions
+from helpers import get_alphabet, get_grid, get_size, print_grid
+
+
+class Restart(Exception):
+    """Raised when a run of the search goes over its backtrack limit"""
+
+
+def luby(i: int) -> int:
+    """The i-th term (from 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ..."""
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+class HamiltonianGridSolver:
+    """
+    Letter grid on an N x N grid as a Hamiltonian path search.
+
+    Consecutive letters on adjacent cells make the letters a path through every cell, the clues
+    are fixed waypoints of it. The path is grown one letter at a time from the ends of the placed
+    letters, always at the end with the fewest candidate cells. A candidate cell must be reachable
+    from the nearest placed letters before and after it: a gap of k letters needs a Manhattan
+    distance of at most k with the same parity, since every step changes the color of the
+    checkerboard.
+
+    After every step `prune` checks that the free cells can still be covered:
+    - a free cell with a single way in is an end of the path, the first or the last letter
+    - every connected region of free cells is covered by the pieces of the path missing between
+      the placed letters next to it, which bounds its size and its cells of each color
+    - the piece between two placed letters fits in its number of letters around the taken cells
+
+    Sparse clues leave long free pieces, where an early mistake is found late. The search restarts
+    after `restart_backtracks` times the Luby sequence backtracks with other random tie breaks,
+    the limit grows without bound so a search that has no solution still ends.
+    """
+
+    def __init__(self, grid: Dict[Tuple[int, int], str], n: int = 5,
+                 restart_backtracks: Optional[int] = 64, seed: Optional[int] = 0):
+        self.n = n
+        self.n_cells = n * n
+        self.alphabet = get_alphabet(self.n_cells)
+        self.letter_index = {letter: i for i, letter in enumerate(self.alphabet)}
+        self.neighbors = []
+        for cell in range(self.n_cells):
+            row, col = divmod(cell, n)
+            around = ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+            self.neighbors.append([r * n + c for r, c in around if 0 <= r < n and 0 <= c < n])
+        # Manhattan distances between all the cells
+        self.distance = [[abs(a // n - b // n) + abs(a % n - b % n) for b in range(self.n_cells)]
+                         for a in range(self.n_cells)]
+
+        self.letter_cell = [-1] * self.n_cells
+        self.cell_letter = [-1] * self.n_cells
+        # indexes of the placed letters in increasing order
+        self.placed = []
+        self.backtracks = 0
+        self.nodes = 0
+        self.restarts = 0
+        self.restart_backtracks = restart_backtracks
+        self.rng = random.Random(seed)
+        self.limit = float('inf')
+
+        self.consistent = True
+        for (row, col), letter in sorted(grid.items()):
+            cell = (row - 1) * n + col - 1
+            l = self.letter_index[letter]
+            if self.cell_letter[cell] >= 0 or self.letter_cell[l] >= 0 or not self.feasible(l, cell):
+                self.consistent = False
+                break
+            self.place(l, cell)
+
+    def feasible(self, letter: int, cell: int) -> bool:
+        """Whether the nearest placed letters before and after `letter` can reach `cell`"""
+        placed = self.placed
+        i = bisect_left(placed, letter)
+        distance = self.distance[cell]
+        if i > 0:
+            gap = letter - placed[i - 1]
+            d = distance[self.letter_cell[placed[i - 1]]]
+            if d > gap or (gap - d) % 2:
+                return False
+        if i < len(placed):
+            gap = placed[i] - letter
+            d = distance[self.letter_cell[placed[i]]]
+            if d > gap or (gap - d) % 2:
+                return False
+        return True
+
+    def place(self, letter: int, cell: int):
+        self.letter_cell[letter] = cell
+        self.cell_letter[cell] = letter
+        insort(self.placed, letter)
+
+    def remove(self, letter: int):
+        self.cell_letter[self.letter_cell[letter]] = -1
+        self.letter_cell[letter] = -1
+        del self.placed[bisect_left(self.placed, letter)]
+
+    def missing(self, letter: int) -> List[int]:
+        """The letters next to `letter` in the alphabet that are not placed yet"""
+        return [other for other in (letter - 1, letter + 1)
+                if 0 <= other < self.n_cells and self.letter_cell[other] < 0]
+
+    def prune(self) -> bool:
+        """False when the free cells cannot be covered by the rest of the path anymore"""
+        free = [cell for cell in range(self.n_cells) if self.cell_letter[cell] < 0]
+        if not free or not self.placed:
+            return True
+
+        # cells of the placed letters the path still has to leave from, with the letters missing
+        open_cells = {}
+        for letter in self.placed:
+            missing = self.missing(letter)
+            if missing:
+                cell = self.letter_cell[letter]
+                if sum(self.cell_letter[other] < 0 for other in self.neighbors[cell]) < len(missing):
+                    return False
+                open_cells[cell] = missing
+
+        # a free cell with a single way in is an end of the path: the first or the last letter if
+        # they are not placed yet and can reach the cell. A cell with two ways in takes both, so
+        # no cell can be forced more ways than the path has through it.
+        ends = [letter for letter in (0, self.n_cells - 1) if self.letter_cell[letter] < 0]
+        dead_ends = []
+        forced = {}
+        for cell in free:
+            ways = []
+            letters = []
+            for other in self.neighbors[cell]:
+                if self.cell_letter[other] < 0:
+                    ways.append(other)
+                else:
+                    fits = [l for l in open_cells.get(other, ()) if self.feasible(l, cell)]
+                    if fits:
+                        ways.append(other)
+                        letters.append(fits)
+            if not ways:
+                return False
+            # between two placed letters the cell is the letter missing between both
+            if len(ways) == 1 or len(ways) == len(letters) == 2 and not set(letters[0]) & set(letters[1]):
+                dead_ends.append(cell)
+                if len(dead_ends) > 2:
+                    return False
+            elif len(ways) == 2 and not any(self.feasible(end, cell) for end in ends):
+                for other in ways:
+                    forced[other] = forced.get(other, 0) + 1
+        for cell, n_forced in forced.items():
+            capacity = len(open_cells[cell]) if cell in open_cells else 2
+            if n_forced > capacity:
+                return False
+        if dead_ends:
+            if not any(all(self.feasible(end, cell) for end, cell in zip(order, dead_ends))
+                       for order in permutations(ends, len(dead_ends))):
+                return False
+
+        first = self.placed[0]
+        base = (self.color(self.letter_cell[first]) - first) % 2
+        # label the connected regions of free cells with their size and number of cells of the
+        # checkerboard color 0
+        region_of = [-1] * self.n_cells
+        sizes, colored = [], []
+        for start in free:
+            if region_of[start] >= 0:
+                continue
+            label = len(sizes)
+            region_of[start] = label
+            region = [start]
+            for cell in region:
+                for other in self.neighbors[cell]:
+                    if self.cell_letter[other] < 0 and region_of[other] < 0:
+                        region_of[other] = label
+                        region.append(other)
+            sizes.append(len(region))
+            colored.append(sum(1 for cell in region if not self.color(cell)))
+
+        # the letters missing between two placed letters (or before the first and after the last)
+        # are a piece of the path through a single region next to the placed letters
+        gaps = []
+        if first > 0:
+            gaps.append((0, first - 1, self.regions_around(first, region_of)))
+        for low, high in zip(self.placed, self.placed[1:]):
+            if high - low > 1:
+                gaps.append((low + 1, high - 1,
+                             self.regions_around(low, region_of) & self.regions_around(high, region_of)))
+        if self.placed[-1] < self.n_cells - 1:
+            last = self.placed[-1]
+            gaps.append((last + 1, self.n_cells - 1, self.regions_around(last, region_of)))
+
+        # every region is covered by the pieces that can go through it: bound its size and its
+        # cells of color 0 by the pieces that can only go there and by all of them
+        least = [[0, 0] for _ in sizes]
+        most = [[0, 0] for _ in sizes]
+        for low, high, regions in gaps:
+            if not regions:
+                return False
+            length = high - low + 1
+            # letters of color 0 in low..high, letter l has the color (base + l) % 2
+            zeros = (length + ((base + low) % 2 == 0)) // 2
+            for label in regions:
+                most[label][0] += length
+                most[label][1] += zeros
+                if len(regions) == 1:
+                    least[label][0] += length
+                    least[label][1] += zeros
+        for label, size in enumerate(sizes):
+            if not least[label][0] <= size <= most[label][0]:
+                return False
+            if not least[label][1] <= colored[label] <= most[label][1]:
+                return False
+
+        # the pieces between two placed letters have to fit in their number of letters, going
+        # around the cells taken since the Manhattan distance was checked
+        for low, high, _ in gaps:
+            if 0 < low and high < self.n_cells - 1 and self.walk(low - 1, high + 1) > high - low + 2:
+                return False
+        return True
+
+    def walk(self, letter: int, target: int) -> float:
+        """Steps from the cell of `letter` to the cell of `target` through free cells"""
+        start, goal = self.letter_cell[letter], self.letter_cell[target]
+        limit = target - letter
+        dist = {start: 0}
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            d = dist[cell] + 1
+            for other in self.neighbors[cell]:
+                if other == goal:
+                    return d
+                if self.cell_letter[other] < 0 and other not in dist:
+                    # a walk over the limit is as good as none
+                    if d + self.distance[other][goal] > limit:
+                        continue
+                    dist[other] = d
+                    queue.append(other)
+        return float('inf')
+
+    def color(self, cell: int) -> int:
+        return (cell // self.n + cell % self.n) % 2
+
+    def regions_around(self, letter: int, region_of: List[int]) -> set:
+        return {region_of[other] for other in self.neighbors[self.letter_cell[letter]] if region_of[other] >= 0}
+
+    def choices(self) -> List[Tuple[int, int]]:
+        """(letter, cell) extensions of the end with the fewest candidate cells, random ties"""
+        if not self.placed:
+            cells = list(range(self.n_cells))
+            self.rng.shuffle(cells)
+            return [(0, cell) for cell in cells]
+        best, best_key = None, None
+        for letter in self.placed:
+            cell = self.letter_cell[letter]
+            for other in self.missing(letter):
+                cells = [c for c in self.neighbors[cell] if self.cell_letter[c] < 0 and self.feasible(other, c)]
+                if len(cells) <= 1:
+                    return [(other, c) for c in cells]
+                key = (len(cells), self.rng.random())
+                if best_key is None or key < best_key:
+                    best, best_key = [(other, c) for c in cells], key
+        # Warnsdorff: the cells with the fewest free neighbors first, they are the easiest to cut off
+        best.sort(key=lambda choice: (sum(self.cell_letter[c] < 0 for c in self.neighbors[choice[1]]),
+                                      self.rng.random()))
+        return best
+
+    def backtrack(self) -> bool:
+        self.nodes += 1
+        if len(self.placed) == self.n_cells:
+            return True
+
+        for letter, cell in self.choices():
+            self.place(letter, cell)
+            if self.prune() and self.backtrack():
+                return True
+            self.remove(letter)
+            self.backtracks += 1
+            if self.backtracks > self.limit:
+                raise Restart()
+        return False
+
+    def restart(self):
+        """Removes every letter but the clues"""
+        for letter in [letter for letter in self.placed if letter not in self.clues]:
+            self.remove(letter)
+
+    def backtracking_search(self) -> Optional[Dict[Tuple[int, int], str]]:
+        """Returns the filled grid {(row, col): letter}, or None if there is no solution"""
+        if not self.consistent or not self.prune():
+            return None
+        self.clues = set(self.placed)
+        self.limit = self.restart_backtracks * luby(1) if self.restart_backtracks else float('inf')
+        while True:
+            try:
+                found = self.backtrack()
+                break
+            except Restart:
+                self.restart()
+                self.restarts += 1
+                self.limit = self.backtracks + self.restart_backtracks * luby(self.restarts + 1)
+        if not found:
+            return None
+        return self.filled()
+
+    def solutions(self) -> Iterator[Dict[Tuple[int, int], str]]:
+        """Yields every solution, one at a time, by a complete search without restarts"""
+        if self.consistent and self.prune():
+            yield from self.enumerate()
+
+    def enumerate(self) -> Iterator[Dict[Tuple[int, int], str]]:
+        self.nodes += 1
+        if len(self.placed) == self.n_cells:
+            yield self.filled()
+            return
+
+        for letter, cell in self.choices():
+            self.place(letter, cell)
+            if self.prune():
+                yield from self.enumerate()
+            self.remove(letter)
+            self.backtracks += 1
+
+    def filled(self) -> Dict[Tuple[int, int], str]:
+        return {(cell // self.n + 1, cell % self.n + 1): self.alphabet[letter]
+                for cell, letter in enumerate(self.cell_letter)}
+
+
+if __name__ == "__main__":
+    file_path = sys.argv[1] if len(sys.argv) > 1 else "input.txt"
+    n = get_size(file_path)
+    solver = HamiltonianGridSolver(get_grid(file_path), n)
+    solution = solver.backtracking_search()
+    if solution is not None:
+        print_grid([(i, j) for i in range(1, n + 1) for j in range(1, n + 1)], solution, n)
+    else:
+        print("No solution found.")
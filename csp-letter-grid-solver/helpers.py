@@ -1,13 +1,39 @@
-def get_adjacent(letter):
+from functools import lru_cache
+
+
+def get_alphabet(n_letters=25):
+    """
+    Returns the first `n_letters` labels: A to Z, then AA, AB, ... like spreadsheet columns,
+    so that grids larger than 5 x 5 get one label per cell.
+    """
+    labels = []
+    for i in range(n_letters):
+        label = ""
+        i += 1
+        while i:
+            i, rem = divmod(i - 1, 26)
+            label = chr(ord("A") + rem) + label
+        labels.append(label)
+    return labels
+
+
+def get_size(file_path):
+    """Returns N of the N x N grid in the file, the number of its non-empty lines"""
+    with open(file_path) as f:
+        return sum(1 for line in f if line.strip())
+
+
+@lru_cache(maxsize=None)
+def _adjacency(n_letters):
+    """Maps every letter of the first `n_letters` to its adjacent(s), built once per alphabet"""
+    alphabet = get_alphabet(n_letters)
+    return {letter: tuple(alphabet[max(idx - 1, 0):idx] + alphabet[idx + 1:idx + 2])
+            for idx, letter in enumerate(alphabet)}
+
+
+def get_adjacent(letter, n_letters=25):
     """Returns adjacent(s) of the letter in a list"""
-    alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXY'
-    if letter == 'A':
-        return [alphabet[1]]
-    elif letter == 'Y':
-        return [alphabet[-2]]
-    else:
-        idx = alphabet.index(letter)
-        return [alphabet[idx-1], alphabet[idx+1]]
+    return list(_adjacency(n_letters)[letter])
     
 
 def get_grid(file_path):
@@ -20,15 +46,15 @@ def get_grid(file_path):
     return grid
 
 
-def print_grid(variables, grid):
-    """Helper function to print the grid"""
+def print_grid(variables, grid, n=5):
+    """Helper function to print the grid, `n` is the number of columns"""
     for variable in variables:
         if variable[1] == 1:
             print("\n")
         if variable in grid.keys():
             if variable[1] == 1:
                 print(f"{grid[variable]}  ", end="")
-            elif variable[1] == 5:
+            elif variable[1] == n:
                 print(f"  {grid[variable]}", end="")
             else:
                 print(f"  {grid[variable]}  ", end="")
@@ -1,199 +1,314 @@
-from typing import List, Tuple
-import heapq
+import multiprocessing
+import sys
+from collections import deque
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 # import helper functions
-from helpers import get_adjacent, get_grid, print_grid
-  
+from helpers import get_adjacent, get_alphabet, get_grid, get_size, print_grid
 
-def get_unassigned_variables() -> List[Tuple[int, int]]:
-    """
-    Returns a list of unassigned variables, sorted by the number of remaining values in their domain.
-    """
-    unassigned_vars = [v for v in variables if v not in assigned_vars]
-    return sorted(unassigned_vars, key=lambda v: len([n for n in get_neighbors(v) if n not in assigned_vars]))
-  
 
-def get_domain(variable: Tuple[int, int]) -> List[str]:
+class LetterGridSolver:
     """
-    Returns the domain of the given variable, taking into account the current assignments.
-    Returns the least domain variables first.
-    """
-    if variable in grid:
-        return [grid[variable]]
-    else:
-        domain = set("ABCDEFGHIJKLMNOPQRSTUVWXY")
-        for var in assigned_vars:
-            domain.discard(grid[var])
-        return list(domain)
+    CSP solver of the letter grid: fill an n x n grid with the first n * n letters so that every
+    letter has its adjacent letters in its neighbourhood.
 
-    
-def get_neighbors(variable: Tuple[int, int]) -> List[Tuple[int, int]]:
-    """
-    Returns a list of neighbors of the given variable.
+    Every solver owns its state, so that solvers can be created, called again and run side by side:
+    - `variables` lists the cells of the grid, [(1, 1), (1, 2), ..., (n, n)]
+    - `grid` maps the assigned cells to their letters, it starts as a copy of the clues
+    - `assigned_vars` is the set of the assigned cells
+    - `domain_values` maps every cell to the letters it can still take, a domain list is replaced
+      rather than changed in place and the list it replaces is pushed on `trail`, so that
+      `unassign` puts it back
+
+    `nodes`, `backtracks`, `propagations`, `revisions` and `propagation_seconds` count the search
+    and the time spent in arc consistency, `stats()` reports them with the mean propagation time
+    per node.
     """
-    row, col = variable
-    neighbors = []
-    if row > 1:
-        neighbors.append((row - 1, col))
-    if row < 5:
-        neighbors.append((row + 1, col))
-    if col > 1:
-        neighbors.append((row, col - 1))
-    if col < 5:
-        neighbors.append((row, col + 1))
-    return neighbors
-  
-  
-def is_satisfied(variable: Tuple[int, int]) -> bool:
-    """This function checks if variables has both of its adjacent letters in the neighbourhood"""
-    if variable in assigned_vars:
-        adjacents = get_adjacent(grid[variable])
-        n_letters = [grid[n] if n in assigned_vars else None for n in get_neighbors(variable)]
-        if len(list(set(adjacents) - set(n_letters))) == 0:
-            return True
-    return False
-  
 
-def is_complete():
-    if len(assigned_vars) != len(variables):
+    def __init__(self, grid: Dict[Tuple[int, int], str], n: int = 5):
+        self.n = n
+        self.n_letters = n * n
+        self.alphabet = get_alphabet(self.n_letters)
+        self.grid = dict(grid)
+        self.variables = [(i, j) for i in range(1, n + 1) for j in range(1, n + 1)]
+        self.assigned_vars = set(self.grid)
+        self.domain_values = {v: self.get_domain(v) for v in self.variables}
+        self.trail = []
+        self.nodes = 0
+        self.backtracks = 0
+        self.propagations = 0
+        self.revisions = 0
+        self.propagation_seconds = 0.0
+
+    def get_unassigned_variables(self) -> List[Tuple[int, int]]:
+        """
+        Returns a list of unassigned variables, sorted by the number of remaining values in their domain.
+        """
+        unassigned_vars = [v for v in self.variables if v not in self.assigned_vars]
+        return sorted(unassigned_vars,
+                      key=lambda v: len([n for n in self.get_neighbors(v) if n not in self.assigned_vars]))
+
+    def get_domain(self, variable: Tuple[int, int]) -> List[str]:
+        """
+        Returns the domain of the given variable, taking into account the current assignments.
+        Returns the least domain variables first.
+        """
+        if variable in self.grid:
+            return [self.grid[variable]]
+        else:
+            used = {self.grid[var] for var in self.assigned_vars}
+            return [letter for letter in self.alphabet if letter not in used]
+
+    def get_neighbors(self, variable: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Returns a list of neighbors of the given variable.
+        """
+        row, col = variable
+        neighbors = []
+        if row > 1:
+            neighbors.append((row - 1, col))
+        if row < self.n:
+            neighbors.append((row + 1, col))
+        if col > 1:
+            neighbors.append((row, col - 1))
+        if col < self.n:
+            neighbors.append((row, col + 1))
+        return neighbors
+
+    def is_satisfied(self, variable: Tuple[int, int]) -> bool:
+        """This function checks if variables has both of its adjacent letters in the neighbourhood"""
+        if variable in self.assigned_vars:
+            adjacents = get_adjacent(self.grid[variable], self.n_letters)
+            n_letters = [self.grid[n] if n in self.assigned_vars else None for n in self.get_neighbors(variable)]
+            if len(list(set(adjacents) - set(n_letters))) == 0:
+                return True
         return False
-    for var in variables:
-        if not is_satisfied(var):
+
+    def is_complete(self):
+        if len(self.assigned_vars) != len(self.variables):
             return False
-    return True
-  
+        for var in self.variables:
+            if not self.is_satisfied(var):
+                return False
+        return True
 
-def assign(variable: Tuple[int, int], value: str) -> bool:
-    """
-    Assigns the given value to the given variable, and performs domain reduction to update the domains of the neighboring variables.
-    Returns True if the assignment is consistent, and False otherwise.
-    """
-    grid[variable] = value
-    assigned_vars.append(variable)
-    domain_values[variable] = [value]
-    return True
+    def assign(self, variable: Tuple[int, int], value: str) -> bool:
+        """
+        Assigns the given value to the given variable, and performs domain reduction to update the domains of the neighboring variables.
+        Returns True if the assignment is consistent, and False otherwise.
+        """
+        self.grid[variable] = value
+        self.assigned_vars.add(variable)
+        self.trail.append((variable, self.domain_values[variable]))
+        self.domain_values[variable] = [value]
+        consistent = True
+        for v in self.variables:
+            if v not in self.assigned_vars and value in self.domain_values[v]:
+                if not self.remove_values(v, [value]):
+                    consistent = False
+        return consistent
 
-  
-def unassign(variable: Tuple[int, int]):
-    """
-    Unassigns the given variable, and restores the domains of the neighboring variables.
-    """
-    del grid[variable]
-    assigned_vars.remove(variable)
-    for v in variables:
-        domain_values[v] = get_domain(v)
-        
-        
-def sort_values(variable):
-    """Prioritizing the values which are adjacent to neighbors"""
-    domain = domain_values[variable]
-    
-    n_values = [grid[n] for n in get_neighbors(variable) if n in assigned_vars]
-    var_values = []
-    for v in n_values:
-        var_values.extend(get_adjacent(v))
-        
-    for value in var_values:
-        if value in domain:
-            domain.remove(value)
-            domain.insert(0, value)
-
-    return domain
-  
-  
-def ac3():
-    """
-    Enforcing arc consistency using ac3 algorithm
-    Idea is to remove the inconsistent elements from the domain of the tail if there is not 
-      at least one value left in the domain of the head which would satisfy the constraint.
-      
-    Constraint is that each of the adjacent letters of the given cell should be in the neighbors,
-      so that we can traverse from A-Y only via neighbors.
-    
-    """
-    heap = []
-    counter = 0
-    for variable in variables:
-        for neighbor in get_neighbors(variable):
-            heap.append((counter, variable, neighbor))
-              
-    heapq.heapify(heap)
-    while heap:
-        arc = heapq.heappop(heap)
-        if remove_inconsistent_values(arc):
-            for variable in variables:
-                new_arc = (counter, variable, arc[1])
-                if new_arc not in heap:
-                    heapq.heappush(heap, new_arc)
-                    
-
-def remove_inconsistent_values(arc):
-    removed = False
-    
-    # if the head is satisfied then no need to remove values from tail
-    if is_satisfied(arc[2]):
-        return removed
-    
-    removed_values = []
-    for value in domain_values[arc[1]]:
-        grid_copy = grid.copy()
-        grid_copy[arc[1]] = value
-        assigned_vars_copy = assigned_vars.copy()
-        assigned_vars_copy.append(arc[1])
-        
-        if arc[2] in assigned_vars_copy:
-            neighbors = get_neighbors(arc[2])
-            n_letters = [grid_copy[n] if n in assigned_vars_copy else None for n in neighbors]
-            unassigned_count = n_letters.count(None)
-            adjacents = get_adjacent(grid_copy[arc[2]])
-            l = list(set(adjacents) - set(n_letters))
-
-            if unassigned_count < len(l):
+    def remove_values(self, variable: Tuple[int, int], values: List[str]) -> bool:
+        """Removes the values from the domain of the variable, False when the domain is wiped out"""
+        domain = self.domain_values[variable]
+        self.trail.append((variable, domain))
+        self.domain_values[variable] = [value for value in domain if value not in values]
+        return len(self.domain_values[variable]) > 0
+
+    def unassign(self, variable: Tuple[int, int], mark: int):
+        """
+        Unassigns the given variable, and restores the domains changed since the trail had `mark`
+        entries, the length before the variable was assigned.
+        """
+        del self.grid[variable]
+        self.assigned_vars.discard(variable)
+        while len(self.trail) > mark:
+            v, domain = self.trail.pop()
+            self.domain_values[v] = domain
+
+    def sort_values(self, variable):
+        """Prioritizing the values which are adjacent to neighbors"""
+        domain = list(self.domain_values[variable])
+
+        n_values = [self.grid[n] for n in self.get_neighbors(variable) if n in self.assigned_vars]
+        var_values = []
+        for v in n_values:
+            var_values.extend(get_adjacent(v, self.n_letters))
+
+        for value in var_values:
+            if value in domain:
+                domain.remove(value)
+                domain.insert(0, value)
+
+        return domain
+
+    def ac3(self, variable: Optional[Tuple[int, int]] = None) -> bool:
+        """
+        Enforcing arc consistency using ac3 algorithm
+        Idea is to remove the inconsistent elements from the domain of the tail if there is not
+          at least one value left in the domain of the head which would satisfy the constraint.
+
+        Constraint is that each of the adjacent letters of the given cell should be in the neighbors,
+          so that we can traverse from A-Y only via neighbors.
+
+        The arcs wait in a FIFO queue, `queued` keeps each arc in it at most once. It starts with the
+        arcs into every assigned cell, or, when `variable` was just assigned, only the arcs into it,
+        into its assigned neighbors and into the assigned cells of its adjacent letters: the domains
+        were consistent before, so the other revisions cannot remove anything new. Only the arcs
+        whose revision reads the domain of a reduced tail are queued again: the arcs from the other
+        neighbors of the assigned cells next to it.
+        Returns False when a domain is wiped out.
+        """
+        tic = perf_counter()
+        if variable is None:
+            heads = [v for v in self.variables if v in self.assigned_vars]
+        else:
+            # `assign` took the letter of `variable` out of every free domain, which only matters
+            # to the assigned cells of its adjacent letters
+            adjacent = get_adjacent(self.grid[variable], self.n_letters)
+            heads = [variable] + [n for n in self.get_neighbors(variable) if n in self.assigned_vars]
+            heads += [v for v in self.assigned_vars if self.grid[v] in adjacent and v not in heads]
+        queue = deque((tail, head) for head in heads for tail in self.get_neighbors(head))
+        queued = set(queue)
+        consistent = True
+        while queue:
+            arc = queue.popleft()
+            queued.discard(arc)
+            if self.remove_inconsistent_values(arc):
+                tail = arc[0]
+                if not self.domain_values[tail]:
+                    consistent = False
+                    break
+                for head in self.get_neighbors(tail):
+                    if head in self.assigned_vars:
+                        for variable in self.get_neighbors(head):
+                            new_arc = (variable, head)
+                            if variable != tail and new_arc not in queued:
+                                queue.append(new_arc)
+                                queued.add(new_arc)
+        self.propagations += 1
+        self.propagation_seconds += perf_counter() - tic
+        return consistent
+
+    def remove_inconsistent_values(self, arc) -> bool:
+        """
+        Removes the values of the tail that leave the assigned head unable to have its adjacent letters
+        around it: each letter still missing needs a free neighbor of the head, other than the tail,
+        with that letter in its domain.
+        """
+        tail, head = arc
+        self.revisions += 1
+
+        # if the head is satisfied then no need to remove values from tail
+        if head not in self.assigned_vars or self.is_satisfied(head):
+            return False
+
+        n_letters = set()
+        free = []
+        for n in self.get_neighbors(head):
+            if n == tail:
+                continue
+            if n in self.assigned_vars:
+                n_letters.add(self.grid[n])
+            else:
+                free.append(n)
+        missing = [a for a in get_adjacent(self.grid[head], self.n_letters) if a not in n_letters]
+        reachable = {a for a in missing if any(a in self.domain_values[n] for n in free)}
+
+        removed_values = []
+        for value in self.domain_values[tail]:
+            # the tail takes one missing letter, the others go to the free neighbors
+            need = [a for a in missing if a != value]
+            if len(need) > len(free) or any(a not in reachable for a in need):
                 removed_values.append(value)
-                removed = True
 
-    for value in removed_values:
-        domain_values[arc[1]].remove(value)
+        if removed_values:
+            self.remove_values(tail, removed_values)
+        return len(removed_values) > 0
 
-    return removed
-      
-  
-def backtrack() -> bool:
-    """
-    Runs the backtracking algorithm to find a solution to the grid world.
-    Returns True if a solution is found, and False otherwise.
-    """
-    if is_complete():
-        return True
-    
-    var = get_unassigned_variables()[0] # MRV
-    ac3() # enforce the arc consistency
-    domain = sort_values(var) # sort the values
-    for value in domain:
-        assign(var, value)
-        result  = backtrack()
-        if result:
+    @property
+    def propagation_seconds_per_node(self) -> float:
+        """Mean time of the arc consistency run at every node of the search"""
+        return self.propagation_seconds / self.propagations if self.propagations else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "nodes": self.nodes,
+            "backtracks": self.backtracks,
+            "propagations": self.propagations,
+            "revisions": self.revisions,
+            "propagation_seconds": self.propagation_seconds,
+            "propagation_seconds_per_node": self.propagation_seconds_per_node,
+        }
+
+    def backtrack(self, assigned: Optional[Tuple[int, int]] = None) -> bool:
+        """
+        Runs the backtracking algorithm to find a solution to the grid world, `assigned` is the cell
+        the caller just assigned.
+        Returns True if a solution is found, and False otherwise.
+        """
+        self.nodes += 1
+        if self.is_complete():
             return True
-        unassign(var)            
-    return False
-  
-  
-def backtracking_search():
-    return backtrack()
-  
-if __name__ == "__main__":
 
-    # get the input grid
-    grid = get_grid("input.txt")
+        unassigned_vars = self.get_unassigned_variables()
+        if not unassigned_vars: # every cell is filled but a constraint is violated
+            return False
+        var = unassigned_vars[0] # MRV
+        if not self.ac3(assigned): # enforce the arc consistency
+            return False
+        domain = self.sort_values(var) # sort the values
+        mark = len(self.trail)
+        for value in domain:
+            if self.assign(var, value) and self.backtrack(var):
+                return True
+            self.unassign(var, mark)
+            self.backtracks += 1
+        return False
+
+    def backtracking_search(self) -> Optional[Dict[Tuple[int, int], str]]:
+        """Returns the filled grid {(row, col): letter}, or None if there is no solution"""
+        if self.backtrack():
+            return self.grid
+        return None
+
+
+def solve_file(file_path: str) -> Tuple[str, Optional[Dict[Tuple[int, int], str]], Dict[str, float]]:
+    """Solves the puzzle in the file, returns (file_path, filled grid or None, solver stats)"""
+    solver = LetterGridSolver(get_grid(file_path), get_size(file_path))
+    solution = solver.backtracking_search()
+    return (file_path, solution, solver.stats())
 
-    # initialie variables, assigned variables and domain of them
-    variables = [(i, j) for i in range(1, 6) for j in range(1, 6)]
-    assigned_vars = [i for i in grid.keys()]
-    domain_values = {v: get_domain(v) for v in variables}
+
+def solve_files(file_paths: Iterable[str], workers: Optional[int] = None
+                ) -> Iterator[Tuple[str, Optional[Dict[Tuple[int, int], str]], Dict[str, float]]]:
+    """
+    Solves many puzzle files across a pool of `workers` processes (all the CPUs by default).
+    Yields (file_path, filled grid or None, solver stats) as soon as every puzzle is solved, not in
+    input order.
+    """
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(solve_file, file_paths)
 
 
-    if backtracking_search():
-        print(grid)
-        print_grid(variables, grid)
+if __name__ == "__main__":
+
+    # solve the input grid, or every file given on the command line across a process pool
+    file_paths = sys.argv[1:] or ["input.txt"]
+    if len(file_paths) == 1:
+        results = [solve_file(file_paths[0])]
     else:
-        print("No solution found.")
+        results = solve_files(file_paths)
+
+    for file_path, solution, stats in results:
+        n = get_size(file_path)
+        if len(file_paths) > 1:
+            print(file_path)
+        if solution is not None:
+            print(solution)
+            print_grid([(i, j) for i in range(1, n + 1) for j in range(1, n + 1)], solution, n)
+        else:
+            print("No solution found.")
+        print(f"{stats['nodes']} nodes, {stats['revisions']} arc revisions, "
+              f"AC-3 {stats['propagation_seconds_per_node'] * 1e3:.2f} ms per node")
@@ -0,0 +1,41 @@
+from main import LetterGridSolver
+from helpers import get_adjacent, get_grid, get_size
+
+
+def test_solution():
+    grid = get_grid("input.txt")
+    n = get_size("input.txt")
+    solution = LetterGridSolver(grid, n).backtracking_search()
+    assert solution is not None
+    assert sorted(solution.values()) == [chr(ord('A') + i) for i in range(n * n)]
+    assert all(solution[cell] == letter for cell, letter in grid.items())
+    for (row, col), letter in solution.items():
+        around = [solution.get(cell)
+                  for cell in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))]
+        assert all(a in around for a in get_adjacent(letter, n * n))
+
+
+def test_unsolvable_grid():
+    # the letters A, C, E, G and I of the 3 x 3 path go on the corners and the center, so E
+    # cannot be on an edge; the search used to fill the grid with repeated letters and crash
+    # picking a cell from none left
+    solver = LetterGridSolver({(1, 2): 'E'}, 3)
+    assert solver.backtracking_search() is None
+    assert solver.grid == {(1, 2): 'E'}
+
+
+def test_filled_grid_violating_constraints():
+    grid = {(1, 1): 'A', (1, 2): 'C', (1, 3): 'B',
+            (2, 1): 'D', (2, 2): 'E', (2, 3): 'F',
+            (3, 1): 'G', (3, 2): 'H', (3, 3): 'I'}
+    assert LetterGridSolver(grid, 3).backtracking_search() is None
+
+
+def test_unassign_restores_domains():
+    solver = LetterGridSolver({(1, 1): 'A'}, 3)
+    domains = dict(solver.domain_values)
+    mark = len(solver.trail)
+    solver.assign((2, 2), 'E')
+    assert 'E' not in solver.domain_values[(3, 3)]
+    solver.unassign((2, 2), mark)
+    assert solver.domain_values == domains
@@ -0,0 +1,141 @@
+"""Regression benchmark for the tile placement CSP
+
+Solves every problem file, verifies the result and records the backtrack `counter`,
+wall time and peak memory of each run. The numbers are compared against a stored
+baseline so that performance regressions show up: the status and the counter are
+deterministic and always checked, time and memory depend on the machine and are only
+checked on request, against a baseline recorded on the same machine.
+
+  python benchmark.py                      # compare against benchmark_baseline.json
+  python benchmark.py --check-time --check-memory --tolerance 0.2
+  python benchmark.py --update             # record a new baseline
+  python benchmark.py problems/tilesproblem_01.txt --max-nodes 5000
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import tracemalloc
+from time import perf_counter
+
+from main import load_landscape, verify_assignment, TilePlacementProblem, NodeLimitExceeded
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+
+def solve(filename, max_nodes=None):
+  """Solves a problem file once
+
+    Returns:
+      (status, counter, seconds): status is 'solved', 'invalid' (the search returned an
+        assignment that does not verify), 'unsolvable' or 'limit' (gave up after `max_nodes`)
+  """
+  landscape, constraints = load_landscape(filename)
+  tic = perf_counter()
+  tpp = TilePlacementProblem(landscape, constraints, max_nodes=max_nodes)
+  try:
+    result = tpp.backtracking_search()
+  except NodeLimitExceeded:
+    return ('limit', tpp.counter, perf_counter() - tic)
+  toc = perf_counter() - tic
+
+  if result is None:
+    return ('unsolvable', tpp.counter, toc)
+  status = 'solved' if verify_assignment(landscape, constraints, result) else 'invalid'
+  return (status, tpp.counter, toc)
+
+
+def peak_memory(filename, max_nodes=None):
+  """Peak traced memory in bytes of solving a problem file, measured in its own run
+     since tracing slows the search down"""
+  tracemalloc.start()
+  try:
+    solve(filename, max_nodes)
+    return tracemalloc.get_traced_memory()[1]
+  finally:
+    tracemalloc.stop()
+
+
+def run(filenames, max_nodes=None):
+  records = {}
+  for filename in filenames:
+    status, counter, seconds = solve(filename, max_nodes)
+    records[os.path.basename(filename)] = {
+      'status': status,
+      'counter': counter,
+      'seconds': round(seconds, 4),
+      'peak_memory': peak_memory(filename, max_nodes),
+      'max_nodes': max_nodes,
+    }
+  return records
+
+
+def compare(records, baseline, tolerance=0.5, check_time=False, check_memory=False):
+  """Lists the regressions of `records` w.r.t `baseline`
+
+    The status and the counter are deterministic: a changed status (other than a search
+    that now finishes within the node limit) and any counter increase are regressions.
+    With `check_time` and `check_memory` the time and peak memory are allowed to grow by
+    `tolerance` (fraction of the baseline value).
+  """
+  regressions = []
+  for name, rec in records.items():
+    base = baseline.get(name)
+    if base is None or base.get('max_nodes') != rec['max_nodes']:
+      continue
+    if rec['status'] != base['status'] and (base['status'], rec['status']) != ('limit', 'solved'):
+      regressions.append(f"{name}: status {base['status']} -> {rec['status']}")
+    if rec['counter'] > base['counter']:
+      regressions.append(f"{name}: counter {base['counter']} -> {rec['counter']}")
+    if check_time and rec['seconds'] > base['seconds'] * (1 + tolerance):
+      regressions.append(f"{name}: time {base['seconds']:.3f}s -> {rec['seconds']:.3f}s")
+    if check_memory and rec['peak_memory'] > base['peak_memory'] * (1 + tolerance):
+      regressions.append(f"{name}: peak memory {base['peak_memory']} -> {rec['peak_memory']}")
+  return regressions
+
+
+def print_table(records, baseline):
+  print(f"{'problem':<24}{'status':<12}{'counter':>10}{'base':>10}{'time [s]':>10}{'base':>10}{'peak [KiB]':>12}")
+  for name, rec in records.items():
+    base = baseline.get(name, {})
+    print(f"{name:<24}{rec['status']:<12}{rec['counter']:>10}{base.get('counter', '-'):>10}"
+          f"{rec['seconds']:>10.3f}{base.get('seconds', float('nan')):>10.3f}{rec['peak_memory'] / 1024:>12.1f}")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+  parser.add_argument('problems', nargs='*', help='problem files, problems/*.txt by default')
+  parser.add_argument('--max-nodes', type=int, default=10000, help='node limit of every search')
+  parser.add_argument('--baseline', default=BASELINE)
+  parser.add_argument('--update', action='store_true', help='write the results as the new baseline')
+  parser.add_argument('--check-time', action='store_true', help='also fail on slower runs')
+  parser.add_argument('--check-memory', action='store_true', help='also fail on a higher peak memory')
+  parser.add_argument('--tolerance', type=float, default=0.5,
+                      help='allowed time/memory growth, as a fraction of the baseline')
+  args = parser.parse_args()
+
+  filenames = args.problems or sorted(glob.glob(os.path.join(os.path.dirname(BASELINE), 'problems', '*.txt')))
+  records = run(filenames, args.max_nodes)
+
+  baseline = {}
+  if os.path.exists(args.baseline):
+    with open(args.baseline) as f:
+      baseline = json.load(f)
+  print_table(records, baseline)
+
+  if args.update:
+    baseline.update(records)
+    with open(args.baseline, 'w') as f:
+      json.dump(baseline, f, indent=2, sort_keys=True)
+    print(f"\nbaseline written to {args.baseline}")
+    return 0
+
+  regressions = compare(records, baseline, args.tolerance, args.check_time, args.check_memory)
+  for regression in regressions:
+    print("REGRESSION", regression)
+  return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
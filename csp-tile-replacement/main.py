@@ -1,10 +1,16 @@
 import sys
 from copy import deepcopy
 import heapq
+import multiprocessing
 import pprint
+import random
+import re
 import numpy as np
 
 TILE_LEN = 4
+TILE_IDS = ['FULL_BLOCK', 'OUTER_BOUNDARY', 'EL_SHAPE']
+BUSH_TYPES = [1, 2, 3, 4]
+ORDERINGS = ['identity', 'mrv', 'variance', 'random']
 
 def load_landscape(problem):
   """Function to load landscape and constraints
@@ -30,14 +36,15 @@ def load_landscape(problem):
 
   landscape_arr = np.array(landscape_arr)
 
-  tile_counts = [int(i.split('=')[-1]) for i in content.split('#')[3].split('\n')[1][1:-1].split(',')]
+  # tiles are listed by name and not always in the same order, e.g. {EL_SHAPE=12, OUTER_BOUNDARY=8, FULL_BLOCK=5}
+  tile_counts = dict(i.strip().split('=') for i in content.split('#')[3].split('\n')[1].strip()[1:-1].split(','))
   
   targets = {int(i.split(":")[0]): int(i.split(":")[1]) for i in content.split('#')[4].strip().split('\n')[1:]}
 
   tile_constraints = {
-    'FULL_BLOCK': tile_counts[2],
-    'OUTER_BOUNDARY': tile_counts[0],
-    'EL_SHAPE': tile_counts[1]
+    'FULL_BLOCK': int(tile_counts['FULL_BLOCK']),
+    'OUTER_BOUNDARY': int(tile_counts['OUTER_BOUNDARY']),
+    'EL_SHAPE': int(tile_counts['EL_SHAPE'])
   }
 
   landscape = landscape_arr \
@@ -53,6 +60,84 @@ def load_landscape(problem):
   return (landscape, constraints)
 
 
+def hidden_counts(landscape):
+  """Counts the bushes each tile shape would hide on every area
+
+    Args:
+      landscape (np.array): (x, TILE_LEN, TILE_LEN) array returned by `load_landscape`
+
+    Returns:
+      hidden (np.array): (x, len(TILE_IDS), len(BUSH_TYPES)) array, hidden[b, t, k] is the number
+        of bushes of type BUSH_TYPES[k] that tile TILE_IDS[t] covers on area b
+  """
+  masks = np.array([[[bool(Tile(tile_id).cover(i, j)) for j in range(TILE_LEN)] for i in range(TILE_LEN)]
+                    for tile_id in TILE_IDS])
+  types = np.asarray(landscape)[:, None, :, :, None] == np.array(BUSH_TYPES)
+  return (types & masks[None, :, :, :, None]).sum(axis=(2, 3))
+
+
+def load_solution(solution):
+  """Function to load a solution, either a solution key (`0 4 EL_SHAPE` lines) or a printed assignment
+
+    Args:
+      solution (str): path or name of the txt file
+
+    Returns:
+      assignment (dict): bush id -> tile id
+  """
+  with open(solution) as f:
+    content = f.read()
+
+  assignment = {int(k): v for k, v in re.findall(r'^\s*\{?(\d+): Tile\(identity=(\w+)\)', content, re.M)}
+  if assignment:
+    return assignment
+
+  # solution keys number the areas column by column of the (square) landscape
+  key = {int(k): v for k, v in re.findall(r'^(\d+) \d+ (\w+)\s*$', content, re.M)}
+  side = int(round(len(key) ** 0.5))
+  return {(k % side) * side + k // side: v for k, v in key.items()}
+
+
+def verify_assignment(landscape, constraints, assignment):
+  """Checks a complete assignment against `tile_counts` and `targets`
+
+    Args:
+      landscape (np.array), constraints (dict): output of `load_landscape`
+      assignment (dict): bush id -> Tile or tile id, e.g. the result of `backtracking_search`
+
+    Returns:
+      True if every bush has a tile, exactly `tile_counts` tiles of each shape are used and
+        the visible bushes match `targets`, otherwise False
+  """
+  if assignment is None or sorted(assignment.keys()) != list(range(len(landscape))):
+    return False
+  tiles = [getattr(assignment[b], 'identity', assignment[b]) for b in range(len(landscape))]
+  if any(tile_id not in TILE_IDS for tile_id in tiles):
+    return False
+  idx = np.array([TILE_IDS.index(tile_id) for tile_id in tiles])
+
+  used = np.bincount(idx, minlength=len(TILE_IDS))
+  if any(used[t] != constraints['tile_counts'][tile_id] for t, tile_id in enumerate(TILE_IDS)):
+    return False
+
+  # FULL_BLOCK hides every bush of the area, so its hidden counts are the bush counts of the area
+  hidden = hidden_counts(landscape)
+  visible = (hidden[:, TILE_IDS.index('FULL_BLOCK')] - hidden[np.arange(len(idx)), idx]).sum(axis=0)
+  return all(visible[k] == constraints['targets'][bush_type] for k, bush_type in enumerate(BUSH_TYPES))
+
+
+def _bitmask(ids):
+  """Bitmask with the bits of the given bush ids set"""
+  mask = 0
+  for i in ids:
+    mask |= 1 << int(i)
+  return mask
+
+
+class NodeLimitExceeded(Exception):
+  """Raised when the search expands more nodes than `max_nodes`"""
+
+
 class Tile:
   """Represents tile objects"""
   def __init__(self, identity):
@@ -79,8 +164,8 @@ class Bush:
   """Represents (TILE_LEN, TILE_LEN) area. It is also considered as variable"""
   def __init__(self, identity, values, targets=None):
     self.identity = identity
-    self.values = values
-    self._backup = deepcopy(values)
+    self.values = values.copy()
+    self._original = values
     self.tile = None
     self.domain = []
   
@@ -94,7 +179,7 @@ class Bush:
           
   def unassign(self):
     """Unassign the variable and restore bush numbers"""
-    self.values = deepcopy(self._backup)
+    self.values[:] = self._original
     self.tile = None
           
   def __lt__(self, other):
@@ -104,6 +189,26 @@ class Bush:
     return f'Bush(identity={self.identity}, tile={self.tile})'
   
 
+class Trail:
+  """Undo log of a TilePlacementProblem
+
+    Every change made by the search (placed tile, used tile count, removed domain value) is pushed
+    as an entry. Backtracking pops the entries back to the mark taken before the decision, so it only
+    costs as much as the work done in the abandoned subtree.
+  """
+  def __init__(self):
+    self.entries = []
+
+  def mark(self):
+    return len(self.entries)
+
+  def push(self, *entry):
+    self.entries.append(entry)
+
+  def __len__(self):
+    return len(self.entries)
+
+
 class Arc:
 
   def __init__(self, tail, head):
@@ -122,50 +227,192 @@ class TilePlacementProblem:
   """CSP algorithm to find the solution
   
   """
-  def __init__(self, landscape, constraints):
+  def __init__(self, landscape, constraints, ordering='identity', seed=None, max_nodes=None,
+               backjumping=True, nogoods=True):
+    if ordering not in ORDERINGS:
+      raise ValueError(f"Unknown ordering {ordering!r}, expected one of {ORDERINGS}")
     self.landscape = landscape.copy()
-    self.tile_counts = constraints['tile_counts']
+    self.tile_counts = dict(constraints['tile_counts'])
     self.targets = constraints['targets']
-    self.bushes = {k: Bush(k, v, self.targets) for k, v in enumerate(landscape)}
+    self.bushes = {k: Bush(k, v, self.targets) for k, v in enumerate(self.landscape)}
     self.counter = 0
+    self.trail = Trail()
+    self.ordering = ordering
+    self.max_nodes = max_nodes
+    self.backjumping = backjumping
+    # subproblems proven infeasible, see `nogood_key`
+    self.nogoods = set() if nogoods else None
+    self.nogood_hits = 0
+    self.wipeout = None
+    self.hidden = hidden_counts(self.landscape)
+    self._target_vec = np.array([self.targets[k] for k in BUSH_TYPES])
+    self._rank = self.static_order(ordering, seed)
+    # visible bushes of every type, bushes without tile count as fully visible
+    self.counts = self.visible_counts()
+    # index in TILE_IDS of the tile placed by the search on every bush, -1 if none
+    self.tile_of = np.full(len(self.bushes), -1)
     for bush_id in self.bushes.keys():
       self.bushes[bush_id].domain = ['FULL_BLOCK', 'OUTER_BOUNDARY', 'EL_SHAPE']
     #   self.bushes[bush_id].domain = list(self.tile_counts.keys())
+
+  def static_order(self, ordering, seed=None):
+    """Rank of every bush for the orderings that do not change during the search
+
+      'variance' puts the most constraining bushes first, i.e. the ones whose hidden counts
+        differ the most between the tile shapes. 'random' shuffles the bushes with `seed`.
+    """
+    ids = list(self.bushes.keys())
+    if ordering == 'variance':
+      spread = self.hidden.var(axis=1).sum(axis=1)
+      ids.sort(key=lambda b: (-spread[b], b))
+    elif ordering == 'random':
+      random.Random(seed).shuffle(ids)
+    return {bush_id: rank for rank, bush_id in enumerate(ids)}
     
   def backtracking_search(self):
     return self.backtrack()
   
   def backtrack(self):
+    return self._backtrack()[0]
+
+  def _backtrack(self):
+    """Backtracking with conflict-directed backjumping and nogood caching
+
+      Returns:
+        (assignment, conflict): the solution, or None and the bitmask of assigned bushes that
+          caused the failure. When the bush assigned by the caller is not part of the
+          conflict, trying its other tiles cannot help and the caller jumps back further.
+    """
     self.counter += 1
+    if self.max_nodes is not None and self.counter > self.max_nodes:
+      raise NodeLimitExceeded(self.counter)
     # if self.counter % 1000 == 0:
     #   print(self.counter, end=", ")
     
-    if self.is_complete() is None:
-      return None
+    complete = self.is_complete()
+    if complete is None:
+      return (None, self.explain_surplus() if self.backjumping else self.assigned())
     
-    if self.is_complete():
+    if complete:
       assignment = {k: v.tile for k, v in self.bushes.items()}
-      return assignment
+      return (assignment, None)
+
+    key = self.nogood_key() if self.nogoods is not None else None
+    if key is not None and key in self.nogoods:
+      self.nogood_hits += 1
+      return (None, self.assigned())
     
     var = self.select_unassigned_var()
-    for tile_id in self.bushes[var].domain:
-      if self.is_consistent(var, tile_id):
-        self.bushes[var].place_tile(tile_id)
-        self.tile_counts[tile_id] -= 1
-        # self.forward_checking()
-        # self.ac_3()
-
-        result = self.backtrack()
+    bit = 1 << var
+    conflict = 0
+    domain = list(self.bushes[var].domain)
+    for tile_id in domain:
+      if not self.is_consistent(var, tile_id):
+        if self.backjumping:
+          conflict |= self.explain(var, tile_id)
+        continue
+
+      mark = self.trail.mark()
+      self.assign(var, tile_id)
+
+      if self.forward_checking():
+        result, child_conflict = self._backtrack()
         if result is not None:
-          return result
+          return (result, None)
+      elif self.backjumping:
+        child_conflict = 0
+        for t in TILE_IDS:
+          child_conflict |= self.explain(self.wipeout, t)
+
+      # unassign variable and restore the pruned domains
+      self.undo(mark)
+
+      if self.backjumping:
+        if not child_conflict & bit:
+          conflict = child_conflict
+          break
+        conflict |= child_conflict & ~bit
+    else:
+      if not self.backjumping:
+        conflict = self.assigned()
+      else:
+        # tiles pruned from the domain before this node fail for the reasons that pruned them
+        for tile_id in TILE_IDS:
+          if tile_id not in domain:
+            conflict |= self.explain(var, tile_id)
+
+    if key is not None:
+      self.nogoods.add(key)
+    return (None, conflict)
+
+  def assigned(self):
+    """Bitmask of the bushes with a tile, conflict sets are bitmasks of bush ids"""
+    return sum(1 << bush.identity for bush in self.bushes.values() if bush.tile is not None)
+
+  def nogood_key(self):
+    """Key of the remaining subproblem: tile counts left, residual target vector and the
+         unassigned bushes (for the 'identity' ordering that is the next bush index).
+         Pruned domains are a function of these, so the subproblem is fully determined by it.
+    """
+    return (tuple(self.tile_counts[tile_id] for tile_id in TILE_IDS),
+            tuple((self.counts - self._target_vec).tolist()),
+            self.assigned())
 
-      # unassign variable
+  def explain(self, var, tile_id):
+    """Assigned bushes that prevent placing `tile_id` on `var`, 0 if nothing does"""
+    t = TILE_IDS.index(tile_id)
+    ids = np.flatnonzero(self.tile_of >= 0)
+    if self.tile_counts[tile_id] == 0:
+      return _bitmask(ids[self.tile_of[ids] == t])
+
+    short = (self.counts - self.hidden[var, t]) < self._target_vec
+    if not short.any():
+      return 0
+    # the bushes whose tiles hide a bush type that became too rare, the others can not
+    # make it more visible. One bush type is enough, take the one with the fewest culprits
+    hiding = self.hidden[ids, self.tile_of[ids]][:, short] > 0
+    return _bitmask(ids[hiding[:, hiding.sum(axis=0).argmin()]])
+
+  def explain_surplus(self):
+    """Assigned bushes responsible for a complete assignment that leaves too many bushes visible"""
+    surplus = self.counts > self._target_vec
+    ids = np.flatnonzero(self.tile_of >= 0)
+    if not surplus.any():
+      return _bitmask(ids)
+    # bushes whose tile already hides the most of a bush type can not make it less visible
+    hidden = self.hidden[ids][:, :, surplus]
+    could_hide_more = hidden[np.arange(len(ids)), self.tile_of[ids]] < hidden.max(axis=1)
+    return _bitmask(ids[could_hide_more[:, could_hide_more.sum(axis=0).argmin()]])
+
+  def assign(self, var, tile_id):
+    """Places the tile and records the change on the trail"""
+    self.bushes[var].place_tile(tile_id)
+    self.tile_counts[tile_id] -= 1
+    self.counts -= self.hidden[var, TILE_IDS.index(tile_id)]
+    self.tile_of[var] = TILE_IDS.index(tile_id)
+    self.trail.push('tile', var, tile_id)
+
+  def remove_value(self, bush_id, tile_id):
+    """Removes the tile from the domain of the bush and records the change on the trail"""
+    domain = self.bushes[bush_id].domain
+    idx = domain.index(tile_id)
+    del domain[idx]
+    self.trail.push('domain', bush_id, idx, tile_id)
+
+  def undo(self, mark):
+    """Pops the trail back to `mark`, restoring tiles, tile counts and domains"""
+    entries = self.trail.entries
+    while len(entries) > mark:
+      entry = entries.pop()
+      if entry[0] == 'tile':
+        _, var, tile_id = entry
         self.bushes[var].unassign()
         self.tile_counts[tile_id] += 1
-        self.set_bush_domains()
-
-    
-    return None
+        self.counts += self.hidden[var, TILE_IDS.index(tile_id)]
+        self.tile_of[var] = -1
+      else:
+        _, bush_id, idx, tile_id = entry
+        self.bushes[bush_id].domain.insert(idx, tile_id)
   
   def is_complete(self):
     """If all the variables are assigned and count of bush types are satisfied,
@@ -175,22 +422,38 @@ class TilePlacementProblem:
     if len(assignment) != self.landscape.shape[0]:
       return False
     
-    land = np.array([a.values for a in self.bushes.values()])
-    counts = np.unique(land, return_counts=True)[1]
-    if (counts[0] == self.targets[1]) \
-      and (counts[1] == self.targets[2]) \
-      and (counts[2] == self.targets[3]) \
-      and (counts[3] == self.targets[4]):
+    if (self.counts == self._target_vec).all():
       return True
     # if all variables have been assigned but targets does not satisfy return None to unassign and continue
     return None
   
   def select_unassigned_var(self):
-    """Selects unassigned variable"""
+    """Selects unassigned variable according to `self.ordering`"""
+    if self.ordering == 'mrv':
+      unassigned = [bush.identity for bush in self.bushes.values() if bush.tile is None]
+      sizes = self.domain_sizes(unassigned)
+      return min(zip(sizes, unassigned))[1]
+    if self.ordering != 'identity':
+      return min((bush for bush in self.bushes.values() if bush.tile is None),
+                 key=lambda bush: self._rank[bush.identity]).identity
+
     heap = list(bush for bush in self.bushes.values() if bush.tile is None)
     heapq.heapify(heap)
     var = heapq.heappop(heap)
     return var.identity
+
+  def visible_counts(self):
+    """Number of visible bushes of every type in the current landscape"""
+    land = np.array([a.values for a in self.bushes.values()])
+    return (land[..., None] == np.array(BUSH_TYPES)).sum(axis=(0, 1, 2))
+
+  def domain_sizes(self, bush_ids):
+    """Number of tiles that can still be placed consistently on each of the given bushes"""
+    left = np.array([self.tile_counts[tile_id] > 0 for tile_id in TILE_IDS])
+    after = self.counts - self.hidden[bush_ids]
+    fits = (after >= self._target_vec).all(axis=-1) & left
+    allowed = np.array([[tile_id in self.bushes[b].domain for tile_id in TILE_IDS] for b in bush_ids])
+    return (fits & allowed).sum(axis=1)
   
   def is_consistent(self, var, tile_id):
     """Returns True if there is availabe tile left and 
@@ -200,10 +463,7 @@ class TilePlacementProblem:
     if self.tile_counts[tile_id] == 0:
       return False
     
-    bushes = deepcopy(self.bushes)
-    bushes[var].place_tile(tile_id)
-    land = np.array([a.values for a in bushes.values()])
-    counts = np.unique(land, return_counts=True)[1]
+    counts = self.counts - self.hidden[var, TILE_IDS.index(tile_id)]
     
     # number of bushes should not be less than target
     if self.inconsistent_bush_counts(counts):
@@ -211,22 +471,23 @@ class TilePlacementProblem:
     return True
       
   def forward_checking(self):
-    exp_tiles = [k for k, v in self.tile_counts.items() if v == 0]
-    unasg_tiles = list(bush for bush in self.bushes.values() if bush.tile is None)
-    
-    for bush in unasg_tiles:
-        
-      for tile in bush.domain:
-        if tile in exp_tiles:
-          self.bushes[bush.identity].domain.remove(tile)
-          continue
-        bushes = deepcopy(self.bushes)
-        bushes[bush.identity].place_tile(tile)
-        land = np.array([a.values for a in bushes.values()])
-        counts = np.unique(land, return_counts=True)[1]
-        if self.inconsistent_bush_counts(counts):
-        #   print(f"removed {tile} from {bush}")
-          self.bushes[bush.identity].domain.remove(tile)
+    """Removes the tiles that can no longer be placed from the domains of unassigned bushes.
+         The removals are recorded on the trail. Returns False if a domain becomes empty
+    """
+    unassigned = [bush.identity for bush in self.bushes.values() if bush.tile is None]
+    if not unassigned:
+      return True
+    left = np.array([self.tile_counts[tile_id] > 0 for tile_id in TILE_IDS])
+    fits = (self.counts - self.hidden[unassigned] >= self._target_vec).all(axis=-1) & left
+
+    for bush_id, bush_fits in zip(unassigned, fits):
+      for tile in list(self.bushes[bush_id].domain):
+        if not bush_fits[TILE_IDS.index(tile)]:
+          self.remove_value(bush_id, tile)
+      if not self.bushes[bush_id].domain:
+        self.wipeout = bush_id
+        return False
+    return True
 
   def set_bush_domains(self):
     """Restores domain of the variables"""
@@ -283,10 +544,194 @@ class TilePlacementProblem:
     return False
 
 
+def bush_classes(landscape):
+  """Groups interchangeable bushes: areas with the same hidden counts for every tile shape
+
+    Returns:
+      classes (list(list(int))): bush ids of every equivalence class, largest classes first
+  """
+  hidden = hidden_counts(landscape)
+  classes = {}
+  for bush_id in range(len(landscape)):
+    classes.setdefault(hidden[bush_id].tobytes(), []).append(bush_id)
+  return sorted(classes.values(), key=lambda ids: (-len(ids), ids[0]))
+
+
+class SymmetricTilePlacement:
+  """Tile placement search over classes of interchangeable bushes
+
+    Bushes of a class only differ by their position, so instead of a tile per bush the search
+    decides how many tiles of each shape go to the class. A class of m bushes then has
+    (m+1)(m+2)/2 values instead of 3^m, the search space shrinks by the multinomial factor.
+    The per bush assignment is expanded from the counts once a solution is found.
+  """
+  def __init__(self, landscape, constraints, max_nodes=None):
+    self.landscape = landscape.copy()
+    self.tile_counts = dict(constraints['tile_counts'])
+    self.targets = constraints['targets']
+    self.classes = bush_classes(self.landscape)
+    self.counter = 0
+    self.max_nodes = max_nodes
+    self.nogoods = set()
+
+    hidden = hidden_counts(self.landscape)
+    full = TILE_IDS.index('FULL_BLOCK')
+    # visible bushes of every type per tile shape for one bush of each class
+    self.visible = np.array([hidden[ids[0], full] - hidden[ids[0]] for ids in self.classes])
+    sizes = np.array([len(ids) for ids in self.classes])[:, None]
+    # bounds of what the classes from index i onwards can still leave visible
+    low = self.visible.min(axis=1) * sizes
+    high = self.visible.max(axis=1) * sizes
+    self._low = np.vstack([np.cumsum(low[::-1], axis=0)[::-1], np.zeros(len(BUSH_TYPES), dtype=int)])
+    self._high = np.vstack([np.cumsum(high[::-1], axis=0)[::-1], np.zeros(len(BUSH_TYPES), dtype=int)])
+    self._target_vec = np.array([self.targets[k] for k in BUSH_TYPES])
+
+  def backtracking_search(self):
+    left = np.array([self.tile_counts[tile_id] for tile_id in TILE_IDS])
+    counts = self.backtrack(0, left, self._target_vec.copy())
+    if counts is None:
+      return None
+    return self.expand(counts)
+
+  def backtrack(self, idx, left, residual):
+    """Chooses tile counts for the classes from `idx` onwards
+
+      Args:
+        idx (int): index of the next class
+        left (np.array): tiles of each shape that are still available
+        residual (np.array): bushes of each type that still have to stay visible
+
+      Returns:
+        list of the tile counts per class from `idx` onwards, None if there is no solution
+    """
+    self.counter += 1
+    if self.max_nodes is not None and self.counter > self.max_nodes:
+      raise NodeLimitExceeded(self.counter)
+
+    if idx == len(self.classes):
+      return [] if not residual.any() and not left.any() else None
+    if (residual < self._low[idx]).any() or (residual > self._high[idx]).any():
+      return None
+
+    key = (idx, tuple(left.tolist()), tuple(residual.tolist()))
+    if key in self.nogoods:
+      return None
+
+    size = len(self.classes[idx])
+    for n_full in range(min(size, left[0]), -1, -1):
+      for n_outer in range(min(size - n_full, left[1]), -1, -1):
+        n = np.array([n_full, n_outer, size - n_full - n_outer])
+        if n[2] > left[2]:
+          continue
+        rest = self.backtrack(idx + 1, left - n, residual - n @ self.visible[idx])
+        if rest is not None:
+          return [n] + rest
+
+    self.nogoods.add(key)
+    return None
+
+  def expand(self, counts):
+    """Per bush assignment from the tile counts of every class"""
+    assignment = {}
+    for ids, n in zip(self.classes, counts):
+      tiles = [tile_id for tile_id, k in zip(TILE_IDS, n) for _ in range(k)]
+      for bush_id, tile_id in zip(ids, tiles):
+        assignment[bush_id] = Tile(tile_id)
+    return dict(sorted(assignment.items()))
+
+
+def restart_search(landscape, constraints, seed=0, first_limit=1000, growth=2, max_restarts=None,
+                   max_nodes=None):
+  """Randomized restarts: random variable orderings with a geometrically growing node limit
+
+    Every restart stops one node past its limit, `max_nodes` bounds the nodes of all the restarts.
+
+    Returns:
+      (assignment, counter): solution (None if there is none or the limits are reached) and the
+        nodes expanded over all restarts
+  """
+  rng = random.Random(seed)
+  limit = first_limit
+  counter = 0
+  restart = 0
+  while max_restarts is None or restart < max_restarts:
+    if max_nodes is not None:
+      if counter >= max_nodes:
+        break
+      limit = min(limit, max_nodes - counter - 1)
+    tpp = TilePlacementProblem(landscape, constraints, ordering='random',
+                               seed=rng.getrandbits(32), max_nodes=limit)
+    try:
+      result = tpp.backtracking_search()
+      return (result, counter + tpp.counter)
+    except NodeLimitExceeded:
+      counter += tpp.counter
+    limit *= growth
+    restart += 1
+  return (None, counter)
+
+
+def _portfolio_member(job):
+  """Runs one member of the portfolio, top level so that it can be sent to a worker process"""
+  landscape, constraints, ordering, seed, max_nodes = job
+  if ordering == 'random':
+    result, counter = restart_search(landscape, constraints, seed=seed, max_nodes=max_nodes)
+  else:
+    tpp = TilePlacementProblem(landscape, constraints, ordering=ordering, seed=seed, max_nodes=max_nodes)
+    try:
+      result = tpp.backtracking_search()
+    except NodeLimitExceeded:
+      result = None
+    counter = tpp.counter
+  return (ordering, seed, result, counter)
+
+
+def portfolio_search(landscape, constraints, orderings=ORDERINGS, n_random=1, workers=None,
+                     max_nodes=None):
+  """Runs differently ordered searches over the same problem in a process pool.
+
+    The first member that finds a solution wins and the remaining ones are terminated.
+
+    Args:
+      landscape (np.array), constraints (dict): output of `load_landscape`
+      orderings (list): variable orderings to race, see `ORDERINGS`
+      n_random (int): number of differently seeded restart searches for the 'random' ordering
+      workers (int): size of the process pool, one process per member by default
+      max_nodes (int): node limit of every member, a member past it gives up
+
+    Returns:
+      (assignment, ordering, counter): solution of the winning member (None if the problem has
+        no solution or every member reached `max_nodes`), its ordering and the number of nodes it
+        expanded
+  """
+  jobs = []
+  for ordering in orderings:
+    seeds = range(n_random) if ordering == 'random' else [None]
+    jobs.extend((landscape, constraints, ordering, seed, max_nodes) for seed in seeds)
+
+  # leaving the context manager terminates the workers still searching
+  with multiprocessing.Pool(workers or len(jobs)) as pool:
+    for ordering, seed, result, counter in pool.imap_unordered(_portfolio_member, jobs):
+      if result is not None:
+        return (result, ordering, counter)
+  return (None, None, None)
+
+
 def main():
   filename = sys.argv[1]
   # 'problems/tilesproblem_01.txt'
   landscape, constraints = load_landscape(filename)
+  if len(sys.argv) > 2 and sys.argv[2] == 'portfolio':
+    result, ordering, counter = portfolio_search(landscape, constraints)
+    print('\n\n', ordering, counter)
+    print(pprint.pformat(result))
+    return
+  if len(sys.argv) > 2 and sys.argv[2] == 'symmetric':
+    search = SymmetricTilePlacement(landscape, constraints)
+    result = search.backtracking_search()
+    print('\n\n', search.counter, len(search.classes))
+    print(pprint.pformat(result))
+    return
   tpp = TilePlacementProblem(landscape, constraints)
   result = tpp.backtracking_search()
   print('\n\n', tpp.counter)
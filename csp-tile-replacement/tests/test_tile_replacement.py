@@ -1,5 +1,10 @@
+import numpy as np
 
-from tileplacement.main import load_landscape, TilePlacementProblem
+from tileplacement.main import (
+    load_landscape, load_solution, verify_assignment, hidden_counts, bush_classes,
+    TilePlacementProblem, SymmetricTilePlacement, TILE_IDS, BUSH_TYPES,
+    restart_search, portfolio_search
+)
 
 def test_select_unassigned_var():
     filename = "problems/tilesproblem_01.txt"
@@ -38,3 +43,140 @@ def test_inconsistent_bush_counts():
         tpp.bushes[i].tile = 'FULL_BLOCK'
     result = tpp.is_consistent(24, 'FULL_BLOCK')
     assert result == True
+
+
+def test_select_unassigned_var_orderings():
+    filename = "problems/tilesproblem_01.txt"
+    landscape, constraints = load_landscape(filename)
+
+    # mrv: bush 17 is left with one tile, bush 9 with two, the others with three
+    tpp = TilePlacementProblem(landscape, constraints, ordering='mrv')
+    tpp.remove_value(17, 'FULL_BLOCK')
+    tpp.remove_value(17, 'EL_SHAPE')
+    tpp.remove_value(9, 'OUTER_BOUNDARY')
+    assert tpp.select_unassigned_var() == 17
+    tpp.assign(17, 'OUTER_BOUNDARY')
+    assert tpp.select_unassigned_var() == 9
+
+    # variance: the bushes whose hidden counts differ the most between the tiles come first
+    tpp = TilePlacementProblem(landscape, constraints, ordering='variance')
+    assert tpp.select_unassigned_var() == 6
+    tpp.assign(6, 'FULL_BLOCK')
+    assert tpp.select_unassigned_var() == 14
+
+    # random: the same seed gives the same order
+    orders = []
+    for _ in range(2):
+        tpp = TilePlacementProblem(landscape, constraints, ordering='random', seed=3)
+        order = []
+        for _ in range(25):
+            order.append(tpp.select_unassigned_var())
+            tpp.bushes[order[-1]].tile = 'FULL_BLOCK'
+        orders.append(order)
+    assert orders[0] == orders[1]
+    assert sorted(orders[0]) == list(range(25))
+
+
+def test_load_landscape_tile_counts_by_name():
+    filename = "problems/tilesproblem_001.txt"
+    landscape, constraints = load_landscape(filename)
+    assert constraints["tile_counts"] == {"FULL_BLOCK": 5, "OUTER_BOUNDARY": 8, "EL_SHAPE": 12}
+
+
+def test_verify_assignment():
+    for name in ["tilesproblem_01", "tilesproblem_03", "tilesproblem_04", "tilesproblem_05"]:
+        landscape, constraints = load_landscape(f"problems/{name}.txt")
+        # solution key shipped in the problem file and printed solution of the solver
+        assert verify_assignment(landscape, constraints, load_solution(f"problems/{name}.txt"))
+        assert verify_assignment(landscape, constraints, load_solution(f"solutions/{name}.txt"))
+
+    landscape, constraints = load_landscape("problems/tilesproblem_01.txt")
+    assignment = {i: "FULL_BLOCK" for i in range(25)}
+    assert not verify_assignment(landscape, constraints, assignment)
+
+
+def test_undo_restores_state():
+    filename = "problems/tilesproblem_01.txt"
+    landscape, constraints = load_landscape(filename)
+    tpp = TilePlacementProblem(landscape, constraints)
+    counts = tpp.counts.copy()
+    tile_counts = dict(tpp.tile_counts)
+    domains = {k: list(v.domain) for k, v in tpp.bushes.items()}
+
+    mark = tpp.trail.mark()
+    for var in range(12):
+        tpp.assign(var, 'FULL_BLOCK')
+        tpp.forward_checking()
+    assert tpp.tile_counts['FULL_BLOCK'] == 0
+    assert 'FULL_BLOCK' not in tpp.bushes[12].domain
+
+    tpp.undo(mark)
+    assert len(tpp.trail) == mark
+    assert (tpp.counts == counts).all()
+    assert tpp.tile_counts == tile_counts
+    assert {k: v.domain for k, v in tpp.bushes.items()} == domains
+    assert all(v.tile is None for v in tpp.bushes.values())
+    assert np.array_equal(tpp.bushes[0].values, landscape[0], equal_nan=True)
+
+
+def test_backjumping_and_nogoods():
+    filename = "problems/tilesproblem_01.txt"
+    landscape, constraints = load_landscape(filename)
+    plain = TilePlacementProblem(landscape, constraints, backjumping=False, nogoods=False)
+    assert verify_assignment(landscape, constraints, plain.backtracking_search())
+    tpp = TilePlacementProblem(landscape, constraints)
+    assert verify_assignment(landscape, constraints, tpp.backtracking_search())
+    assert tpp.counter < plain.counter
+    assert tpp.nogood_hits > 0
+
+
+def test_symmetric_tile_placement():
+    filename = "problems/tilesproblem_01.txt"
+    landscape, constraints = load_landscape(filename)
+    # make two classes of interchangeable bushes and derive targets from the solution key
+    for i in range(1, 8):
+        landscape[i] = landscape[0]
+    for i in range(9, 14):
+        landscape[i] = landscape[8]
+    solution = load_solution(filename)
+    idx = np.array([TILE_IDS.index(solution[i]) for i in range(25)])
+    hidden = hidden_counts(landscape)
+    visible = (hidden[:, 0] - hidden[np.arange(25), idx]).sum(axis=0)
+    constraints = {
+        "tile_counts": {tile_id: int((idx == t).sum()) for t, tile_id in enumerate(TILE_IDS)},
+        "targets": {k: int(v) for k, v in zip(BUSH_TYPES, visible)},
+    }
+
+    assert [len(ids) for ids in bush_classes(landscape)][:2] == [8, 6]
+    search = SymmetricTilePlacement(landscape, constraints)
+    assert len(search.classes) == 13
+    result = search.backtracking_search()
+    assert verify_assignment(landscape, constraints, result)
+
+
+def test_restart_search():
+    filename = "problems/tilesproblem_01.txt"
+    landscape, constraints = load_landscape(filename)
+    # every restart stops one node past its limit of 5, 10 and 20 nodes
+    result, counter = restart_search(landscape, constraints, seed=0, first_limit=5, max_restarts=3)
+    assert result is None
+    assert counter == 6 + 11 + 21
+    assert restart_search(landscape, constraints, seed=0, first_limit=5, max_restarts=3) == (None, counter)
+
+    result, counter = restart_search(landscape, constraints, seed=1, first_limit=5, max_nodes=40)
+    assert result is None
+    assert counter == 40
+
+
+def test_portfolio_search():
+    filename = "problems/tilesproblem_01.txt"
+    landscape, constraints = load_landscape(filename)
+    assert portfolio_search(landscape, constraints, orderings=['identity', 'mrv'], workers=1,
+                            max_nodes=10) == (None, None, None)
+
+    result, ordering, counter = portfolio_search(landscape, constraints, orderings=['mrv'], workers=1,
+                                                 max_nodes=5000)
+    assert verify_assignment(landscape, constraints, result)
+    tpp = TilePlacementProblem(landscape, constraints, ordering='mrv')
+    tpp.backtracking_search()
+    assert (ordering, counter) == ('mrv', tpp.counter)
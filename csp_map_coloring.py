@@ -1,4 +1,11 @@
 import heapq
+import itertools
+import json
+import multiprocessing
+import random
+import sys
+from collections import deque
+from time import perf_counter
 
 
 class Territory:
@@ -9,7 +16,10 @@ class Territory:
     self.color = None
     self.domains = []
     self.n_neigh = len(self.neighbors)
-    self.n_dom = len(self.domains)
+
+  @property
+  def n_dom(self):
+    return len(self.domains)
 
   def __lt__(self, other):
     if self.n_dom == other.n_dom:
@@ -43,6 +53,11 @@ class MapColoring:
     self.territories = {k: Territory(k, v) for k, v in self.constraints.items()}
     for ter in self.territories.values():
       ter.domains = domains.copy()
+    # (tail, head, value of tail) -> value of head that supported it last time
+    self.residues = {}
+    # (name, position, value) of every value removed from a domain, undone on backtrack
+    self.trail = []
+    self.backtracks = 0
 
   def backtracking_search(self):
     return self.backtrack()
@@ -54,22 +69,32 @@ class MapColoring:
       return assignment
 
     var = self.select_unassigned_variable()
-    for val in var.domains:
+    for val in list(var.domains):
       # if self.is_consistent(var, val):
       # if forward checking is used, no need to consistency check
+      mark = len(self.trail)
       self.territories[var.name].color = val
-      self.forward_checking(var, val)
-      self.ac_3()
-
-      result = self.backtrack()
-      if result is not None:
-        return result
+      if self.forward_checking(var, val) and self.ac_3():
+        result = self.backtrack()
+        if result is not None:
+          return result
 
-      # if consistency is violated
-      print("consistency is violated")
+      # consistency is violated, restore the domains pruned since `mark`
+      self.backtracks += 1
+      self.undo(mark)
       self.territories[var.name].color = None
     return None
 
+  def remove_value(self, ter, val):
+    pos = ter.domains.index(val)
+    del ter.domains[pos]
+    self.trail.append((ter.name, pos, val))
+
+  def undo(self, mark):
+    while len(self.trail) > mark:
+      name, pos, val = self.trail.pop()
+      self.territories[name].domains.insert(pos, val)
+
   def select_unassigned_variable(self):
     heap = list(ter for ter in self.territories.values() if ter.color is None)
     heapq.heapify(heap)
@@ -90,37 +115,730 @@ class MapColoring:
     return True
 
   def forward_checking(self, var, val):
+    """Removes `val` from the domains of the unassigned neighbors, False on a wipeout"""
     for neigh in self.constraints.get(var.name):
-      try:
-        self.territories[neigh].domains.remove(val)
-      except ValueError:
-        pass
+      ter = self.territories[neigh]
+      if ter.color is None and val in ter.domains:
+        self.remove_value(ter, val)
+        if not ter.domains:
+          return False
+    return True
 
   def ac_3(self):
-    heap = []
-    for k,v in constraints.items():
+    """AC-3 over the arcs between unassigned territories, False when a domain is wiped out
+
+      The queue is a deque next to the set of its (tail, head) pairs, so an arc is only put
+      back when it is not queued already.
+    """
+    queue = deque()
+    for k, v in self.constraints.items():
       for n in v:
         if (self.territories[k].color is None) and (self.territories[n].color is None):
-          arc = Arc(k, n)
-          heap.append(arc)
+          queue.append(Arc(k, n))
+    queued = {(arc.tail, arc.head) for arc in queue}
 
-    while heap:
-      arc = heapq.heappop(heap)
+    while queue:
+      arc = queue.popleft()
+      queued.discard((arc.tail, arc.head))
       if self.remove_inconsistent_values(arc):
+        if not self.territories[arc.tail].domains:
+          return False
         for n in self.territories[arc.tail].neighbors:
-          new_arc = Arc(n, arc.tail)
-          if str(new_arc) not in [str(a) for a in heap]:
-            heapq.heappush(heap, new_arc)
+          if n != arc.head and self.territories[n].color is None and (n, arc.tail) not in queued:
+            queue.append(Arc(n, arc.tail))
+            queued.add((n, arc.tail))
+    return True
 
   def remove_inconsistent_values(self, arc):
+    """Removes the values of the tail without a different value left in the head
+
+      The supporting value found for a tail value is kept as residue (as in AC-2001) and
+      checked first the next time the arc is revised.
+    """
+    tail = self.territories[arc.tail]
+    head_domains = self.territories[arc.head].domains
     removed = False
-    for val in self.territories[arc.tail].domains:
-      if len([v for v in self.territories[arc.head].domains if v != val]) == 0:
-        self.territories[arc.tail].domains.remove(val)
+    for val in list(tail.domains):
+      residue = self.residues.get((arc.tail, arc.head, val))
+      if residue is not None and residue in head_domains:
+        continue
+      support = next((v for v in head_domains if v != val), None)
+      if support is None:
+        self.remove_value(tail, val)
         removed = True
+      else:
+        self.residues[(arc.tail, arc.head, val)] = support
     return removed
 
 
+class BacktrackLimitExceeded(Exception):
+  """Raised when the search backtracks more often than `max_backtracks`"""
+
+
+class CompactMapColoring:
+  """Map coloring over integer region indices with bitmask domains
+
+    Region i is `variables[i]`, `adjacency[i]` lists its neighbors (the constraints are made
+    symmetric) and bit c of `domain[i]` is set while the color `colors[c]` is still possible. The
+    search is iterative with forward checking, or with arc consistency maintained by `ac_3` when
+    inference='mac': every domain change is pushed on `trail` and undone on backtrack. The next
+    variable is the unassigned one with the fewest colors left, ties going to the most unassigned
+    neighbors, taken from a lazy heap that gets a new entry whenever a domain or a degree changes
+    and drops the outdated ones when they come up. A region whose colors all failed makes the
+    search jump back to the latest region in its conflict set (CBJ), the assigned regions that
+    forward checking or AC-3 traced its failures back to through the `reason` of every removal.
+  """
+
+  def __init__(self, variables, domains, constraints, inference='forward_checking', max_backtracks=None):
+    if inference not in ('forward_checking', 'mac'):
+      raise ValueError(f"Unknown inference {inference!r}, expected 'forward_checking' or 'mac'")
+    self.inference = inference
+    self.max_backtracks = max_backtracks
+    self.variables = tuple(variables)
+    self.colors = list(domains)
+    self.index = {name: i for i, name in enumerate(self.variables)}
+    n = len(self.variables)
+
+    neighbors = [set() for _ in range(n)]
+    for name, neighs in constraints.items():
+      i = self.index[name]
+      for other in neighs:
+        j = self.index[other]
+        if j != i:
+          neighbors[i].add(j)
+          neighbors[j].add(i)
+    self.adjacency = [sorted(neighs) for neighs in neighbors]
+    # number of unassigned neighbors
+    self.degree = [len(neighs) for neighs in self.adjacency]
+
+    full = (1 << len(self.colors)) - 1
+    # number of colors of every domain bitmask
+    self._size = [bin(mask).count('1') for mask in range(full + 1)]
+    self._full = full
+    self.domain = [full] * n
+    # reason[i][c] is why color c is out of the domain of region i: the assigned region whose
+    # color it is, or ~head when AC-3 removed it because region `head` was left with color c
+    self.reason = [[None] * len(self.colors) for _ in range(n)]
+    self.color = [-1] * n
+    self.n_assigned = 0
+    self.trail = []
+    # region left without colors by the last failed propagation
+    self.wipeout = None
+    self.backtracks = 0
+    self.propagations = 0
+    self.revisions = 0
+    self._heap = [(self._size[full], -self.degree[i], i) for i in range(n)]
+    heapq.heapify(self._heap)
+
+  def assignment(self):
+    return {self.variables[i]: self.colors[c] for i, c in enumerate(self.color) if c >= 0}
+
+  def is_complete(self):
+    return self.n_assigned == len(self.variables)
+
+  def push(self, var):
+    """Adds the current priority of `var` to the heap"""
+    heapq.heappush(self._heap, (self._size[self.domain[var]], -self.degree[var], var))
+
+  def select_unassigned_variable(self):
+    while self._heap:
+      size, degree, var = heapq.heappop(self._heap)
+      if self.color[var] < 0 and size == self._size[self.domain[var]] and -degree == self.degree[var]:
+        return var
+    return None
+
+  def remove(self, var, mask, reason):
+    """Removes the colors of `mask` from `var` because of `reason`, False on a wipeout"""
+    domain = self.domain[var]
+    removed = domain & mask
+    if removed:
+      self.trail.append((var, domain))
+      reasons = self.reason[var]
+      while removed:
+        low = removed & -removed
+        reasons[low.bit_length() - 1] = reason
+        removed ^= low
+      domain &= ~mask
+      self.domain[var] = domain
+      self.push(var)
+    return domain != 0
+
+  def assign(self, var, c):
+    self.trail.append((var, self.domain[var]))
+    self.domain[var] = 1 << c
+    self.color[var] = c
+    self.n_assigned += 1
+    for neigh in self.adjacency[var]:
+      self.degree[neigh] -= 1
+      if self.color[neigh] < 0:
+        self.push(neigh)
+
+  def undo(self, mark):
+    while len(self.trail) > mark:
+      var, domain = self.trail.pop()
+      # domains only shrink while a region is unassigned, so the entry of an assigned region
+      # is the one recorded by its assignment
+      if self.color[var] >= 0:
+        self.color[var] = -1
+        self.n_assigned -= 1
+        for neigh in self.adjacency[var]:
+          self.degree[neigh] += 1
+          if self.color[neigh] < 0:
+            self.push(neigh)
+      self.domain[var] = domain
+      self.push(var)
+
+  def explain(self, var, mask):
+    """Set of the assigned regions that took the colors of `mask` away from `var`
+
+      A color removed by AC-3 is explained by the colors its head lost before. The removals of
+      the head come earlier on the trail, so they are still in place and their reasons too.
+    """
+    regions = set()
+    seen = set()
+    stack = [(var, mask)]
+    while stack:
+      var, mask = stack.pop()
+      reasons = self.reason[var]
+      while mask:
+        low = mask & -mask
+        mask ^= low
+        reason = reasons[low.bit_length() - 1]
+        if reason >= 0:
+          regions.add(reason)
+        elif (var, low) not in seen:
+          seen.add((var, low))
+          stack.append((~reason, self._full & ~low))
+    return regions
+
+  def forward_checking(self, var, c):
+    bit = 1 << c
+    for neigh in self.adjacency[var]:
+      if self.color[neigh] < 0 and not self.remove(neigh, bit, var):
+        self.wipeout = neigh
+        return False
+    return True
+
+  def ac_3(self, arcs):
+    """AC-3 from the (tail, head) index pairs `arcs`, False when a domain is wiped out
+
+      The queue is a deque next to the set of its pairs, an arc is only put back when it is not
+      queued already. A color of the tail loses its last support only when the head is down to
+      that single color, so revising an arc is a bitmask test and needs no residues.
+    """
+    queue = deque(arcs)
+    queued = set(queue)
+    while queue:
+      tail, head = queue.popleft()
+      queued.discard((tail, head))
+      self.revisions += 1
+      head_domain = self.domain[head]
+      if self._size[head_domain] != 1 or not self.domain[tail] & head_domain:
+        continue
+      if not self.remove(tail, head_domain, ~head):
+        self.wipeout = tail
+        return False
+      for neigh in self.adjacency[tail]:
+        arc = (neigh, tail)
+        if neigh != head and self.color[neigh] < 0 and arc not in queued:
+          queue.append(arc)
+          queued.add(arc)
+    return True
+
+  def propagate(self, var, c):
+    """Inference after assigning color `c` to `var`, False on a wipeout
+
+      `wipeout` is then the region left without colors.
+    """
+    self.propagations += 1
+    if not self.forward_checking(var, c):
+      return False
+    if self.inference == 'forward_checking':
+      return True
+    # only a neighbor left with a single color can take a color away from its own neighbors
+    arcs = [(other, neigh) for neigh in self.adjacency[var]
+            if self.color[neigh] < 0 and self._size[self.domain[neigh]] == 1
+            for other in self.adjacency[neigh] if self.color[other] < 0]
+    return self.ac_3(arcs)
+
+  def backtracking_search(self):
+    """Returns the assignment {name: color}, or None when the map cannot be colored"""
+    if self.is_complete():
+      return self.assignment()
+
+    var = self.select_unassigned_variable()
+    level = {var: 0}
+    # frames are [variable, colors not tried yet, trail length before its assignment, conflict set]
+    stack = [[var, self.domain[var], len(self.trail), set()]]
+    while stack:
+      frame = stack[-1]
+      var, remaining, mark, conflicts = frame
+      if len(self.trail) > mark:
+        # the previous color of `var` failed
+        self.undo(mark)
+        self.backtracks += 1
+        if self.max_backtracks is not None and self.backtracks > self.max_backtracks:
+          raise BacktrackLimitExceeded()
+      if not remaining:
+        self.backjump(stack, level)
+        continue
+
+      low = remaining & -remaining
+      frame[1] = remaining & ~low
+      c = low.bit_length() - 1
+      self.assign(var, c)
+      if not self.propagate(var, c):
+        conflicts.update(self.explain(self.wipeout, self._full))
+        conflicts.discard(var)
+        continue
+      if self.is_complete():
+        return self.assignment()
+
+      var = self.select_unassigned_variable()
+      level[var] = len(stack)
+      stack.append([var, self.domain[var], len(self.trail), set()])
+    return None
+
+  def backjump(self, stack, level):
+    """Pops the frames up to the latest region in the conflict set of the exhausted top frame
+
+      The conflict set holds the assigned regions that made its colors fail, with forward
+      checking or AC-3, and the ones that took colors away from it before it was chosen.
+    """
+    var, _, _, conflicts = stack.pop()
+    if not stack:
+      return
+    conflicts.update(self.explain(var, self._full & ~self.domain[var]))
+    if not conflicts:
+      # no assignment is to blame, the map cannot be colored
+      stack.clear()
+      return
+    target = max(conflicts, key=level.__getitem__)
+    while stack[-1][0] != target:
+      stack.pop()
+    conflicts.discard(target)
+    stack[-1][3].update(conflicts)
+
+
+class DecomposedMapColoring:
+  """Solves every connected component of the constraint graph on its own
+
+    Isolated regions and independent parts of the map no longer share one search, a failure
+    in one component cannot make the search redo another. A component whose cycles are broken
+    by at most `max_cutset` regions is solved without search: a tree by directional arc
+    consistency (DAC) from the leaves to the root and a greedy color choice from the root down,
+    any other one by cutset conditioning, which runs DAC on the remaining forest for every
+    consistent coloring of the cutset. The rest go to `CompactMapColoring`. With `workers` the
+    components are solved in a process pool.
+  """
+
+  def __init__(self, variables, domains, constraints, max_cutset=6, workers=None, max_backtracks=None):
+    self.problem = CompactMapColoring(variables, domains, constraints)
+    self.max_cutset = max_cutset
+    # limit of every component searched by `CompactMapColoring`
+    self.max_backtracks = max_backtracks
+    self.workers = workers
+    # number of components solved by every method
+    self.methods = {'tree': 0, 'cutset': 0, 'search': 0}
+
+  def components(self):
+    adjacency = self.problem.adjacency
+    seen = [False] * len(adjacency)
+    components = []
+    for start in range(len(adjacency)):
+      if seen[start]:
+        continue
+      seen[start] = True
+      component = [start]
+      for var in component:
+        for neigh in adjacency[var]:
+          if not seen[neigh]:
+            seen[neigh] = True
+            component.append(neigh)
+      components.append(component)
+    return components
+
+  def cycle_cutset(self, component):
+    """Regions whose removal leaves `component` a forest, None if more than `max_cutset` are needed
+
+      Leaves are peeled off repeatedly, then the region with most neighbors left in the
+      remaining core goes into the cutset.
+    """
+    adjacency = self.problem.adjacency
+    degree = {var: len(adjacency[var]) for var in component}
+    removed = set()
+    cutset = []
+    stack = [var for var in component if degree[var] <= 1]
+    while True:
+      while stack:
+        var = stack.pop()
+        if var in removed:
+          continue
+        removed.add(var)
+        for neigh in adjacency[var]:
+          if neigh not in removed:
+            degree[neigh] -= 1
+            if degree[neigh] == 1:
+              stack.append(neigh)
+      core = [var for var in component if var not in removed]
+      if not core:
+        return cutset
+      if len(cutset) == self.max_cutset:
+        return None
+      var = max(core, key=degree.get)
+      cutset.append(var)
+      stack.append(var)
+      # `var` is peeled off with the leaves
+      degree[var] = 0
+
+  def solve_tree(self, root, domain, active, color):
+    """Colors the tree of `active` regions containing `root`, False when it cannot be colored
+
+      `domain` (region -> bitmask) is narrowed in place, the colors go to `color`.
+    """
+    adjacency = self.problem.adjacency
+    parent = {root: -1}
+    order = [root]
+    for var in order:
+      for neigh in adjacency[var]:
+        if neigh in active and neigh not in parent:
+          parent[neigh] = var
+          order.append(neigh)
+
+    # DAC: children come after their parent in `order`, a child left with a single color
+    # takes it away from its parent
+    for var in reversed(order):
+      if domain[var] == 0:
+        return False
+      if var != root and self.problem._size[domain[var]] == 1:
+        domain[parent[var]] &= ~domain[var]
+
+    for var in order:
+      mask = domain[var]
+      if var != root:
+        mask &= ~(1 << color[parent[var]])
+      color[var] = (mask & -mask).bit_length() - 1
+    return True
+
+  def solve_forest(self, nodes, domain, color):
+    active = set(nodes)
+    for var in nodes:
+      if var not in color and not self.solve_tree(var, domain, active, color):
+        return False
+    return True
+
+  def solve_component(self, component):
+    """Returns ({region index: color index} or None, method used)"""
+    full = (1 << len(self.problem.colors)) - 1
+    cutset = self.cycle_cutset(component)
+    if cutset is None:
+      names = self.problem.variables
+      adjacency = self.problem.adjacency
+      sub = CompactMapColoring([names[var] for var in component], self.problem.colors,
+                               {names[var]: tuple(names[n] for n in adjacency[var]) for var in component},
+                               max_backtracks=self.max_backtracks)
+      if sub.backtracking_search() is None:
+        return (None, 'search')
+      return (dict(zip(component, sub.color)), 'search')
+
+    if not cutset:
+      color = {}
+      solved = self.solve_forest(component, {var: full for var in component}, color)
+      return (color if solved else None, 'tree')
+
+    adjacency = self.problem.adjacency
+    rest = [var for var in component if var not in set(cutset)]
+    for colors in itertools.product(range(len(self.problem.colors)), repeat=len(cutset)):
+      color = dict(zip(cutset, colors))
+      if any(color.get(neigh, -1) == color[var] for var in cutset for neigh in adjacency[var]):
+        continue
+      domain = {var: full for var in rest}
+      for var in cutset:
+        for neigh in adjacency[var]:
+          if neigh in domain:
+            domain[neigh] &= ~(1 << color[var])
+      if self.solve_forest(rest, domain, color):
+        return (color, 'cutset')
+    return (None, 'cutset')
+
+  def backtracking_search(self):
+    """Returns the assignment {name: color}, or None when the map cannot be colored"""
+    components = self.components()
+    if self.workers and len(components) > 1:
+      names = self.problem.variables
+      adjacency = self.problem.adjacency
+      jobs = [([names[var] for var in component], self.problem.colors,
+               {names[var]: tuple(names[n] for n in adjacency[var]) for var in component},
+               self.max_cutset, self.max_backtracks) for component in components]
+      with multiprocessing.Pool(self.workers) as pool:
+        results = pool.map(_solve_component, jobs, chunksize=max(1, len(jobs) // (4 * self.workers)))
+    else:
+      results = [self.named(*self.solve_component(component)) for component in components]
+
+    assignment = {}
+    for result, method in results:
+      self.methods[method] += 1
+      if result is None:
+        return None
+      assignment.update(result)
+    return assignment
+
+  def named(self, color, method):
+    """Maps the output of `solve_component` to ({name: color} or None, method)"""
+    if color is None:
+      return (None, method)
+    return ({self.problem.variables[var]: self.problem.colors[c] for var, c in color.items()}, method)
+
+
+class MinConflictsMapColoring:
+  """Min-conflicts local search over a complete coloring
+
+    Starts from a greedy coloring, then repeatedly gives a random conflicting region the color
+    fewest of its neighbors have, ties (its current color included) broken at random. With
+    probability `walk_probability` the region takes a random color instead. A region may not take
+    back a color it left for `tabu_tenure` steps unless that color has no conflicts. The color
+    counts of the neighbors of every region and the list of conflicting regions are kept up to
+    date by every move, so a step costs the degree of the moved region. With a single color no
+    region can move and the local search is skipped.
+
+    Gives up after `max_steps` steps (100 per region by default) or `time_budget` seconds and,
+    with `fallback`, hands the map to `CompactMapColoring` limited to `max_backtracks`.
+    `curve` samples (step, conflicting edges) every `curve_every` steps.
+  """
+
+  def __init__(self, variables, domains, constraints, max_steps=None, time_budget=None,
+               tabu_tenure=10, walk_probability=0.02, seed=None, fallback=True, curve_every=100,
+               max_backtracks=None):
+    self.problem = CompactMapColoring(variables, domains, constraints, max_backtracks=max_backtracks)
+    self.max_steps = max_steps if max_steps is not None else max(10000, 100 * len(self.problem.variables))
+    self.time_budget = time_budget
+    self.tabu_tenure = tabu_tenure
+    self.walk_probability = walk_probability
+    self.rng = random.Random(seed)
+    self.fallback = fallback
+    self.curve_every = curve_every
+    self.steps = 0
+    self.seconds = 0
+    self.curve = []
+    self.fell_back = False
+
+  @property
+  def backtracks(self):
+    """Backtracks of the fallback search"""
+    return self.problem.backtracks
+
+  @property
+  def steps_per_second(self):
+    return self.steps / self.seconds if self.seconds else 0
+
+  def initial_coloring(self):
+    """Greedy coloring in random order, every region takes its least conflicting color"""
+    adjacency = self.problem.adjacency
+    k = len(self.problem.colors)
+    order = list(range(len(adjacency)))
+    self.rng.shuffle(order)
+    color = [-1] * len(adjacency)
+    for var in order:
+      counts = [0] * k
+      for neigh in adjacency[var]:
+        if color[neigh] >= 0:
+          counts[color[neigh]] += 1
+      best = min(counts)
+      color[var] = self.rng.choice([c for c in range(k) if counts[c] == best])
+    return color
+
+  def backtracking_search(self):
+    """Same as `search`, the entry point of the other solvers"""
+    return self.search()
+
+  def search(self):
+    """Returns the assignment {name: color}, or None when it fails and `fallback` is off"""
+    tic = perf_counter()
+    adjacency = self.problem.adjacency
+    k = len(self.problem.colors)
+    n = len(adjacency)
+    rng = self.rng
+    if n == 0 or k == 0:
+      return self.finish({} if n == 0 else None, tic)
+
+    color = self.initial_coloring()
+    # counts[var * k + c]: neighbors of `var` colored c
+    counts = [0] * (n * k)
+    for var in range(n):
+      for neigh in adjacency[var]:
+        counts[var * k + color[neigh]] += 1
+    conflicted = [var for var in range(n) if counts[var * k + color[var]]]
+    position = [-1] * n
+    for i, var in enumerate(conflicted):
+      position[var] = i
+    conflicts = sum(counts[var * k + color[var]] for var in conflicted) // 2
+    tabu = [0] * (n * k)
+    deadline = None if self.time_budget is None else tic + self.time_budget
+    max_steps = self.max_steps if k > 1 else 0
+
+    step = 0
+    self.curve = []
+    while conflicts and step < max_steps:
+      if step % self.curve_every == 0:
+        self.curve.append((step, conflicts))
+      if deadline is not None and step % 1024 == 0 and perf_counter() > deadline:
+        break
+      step += 1
+      var = conflicted[rng.randrange(len(conflicted))]
+      old = color[var]
+      base = var * k
+      if rng.random() < self.walk_probability:
+        new = rng.randrange(k - 1)
+        new += new >= old
+      else:
+        best, choices = counts[base + old], [old]
+        for c in range(k):
+          if c == old or (tabu[base + c] > step and counts[base + c]):
+            continue
+          if counts[base + c] < best:
+            best, choices = counts[base + c], [c]
+          elif counts[base + c] == best:
+            choices.append(c)
+        new = rng.choice(choices)
+        if new == old:
+          continue
+
+      color[var] = new
+      tabu[base + old] = step + self.tabu_tenure
+      conflicts += counts[base + new] - counts[base + old]
+      for neigh in adjacency[var]:
+        nbase = neigh * k
+        counts[nbase + old] -= 1
+        counts[nbase + new] += 1
+        self._update(neigh, counts[nbase + color[neigh]], conflicted, position)
+      self._update(var, counts[base + new], conflicted, position)
+
+    self.steps = step
+    if not self.curve or self.curve[-1][0] != step:
+      self.curve.append((step, conflicts))
+    if not conflicts:
+      return self.finish({self.problem.variables[var]: self.problem.colors[c] for var, c in enumerate(color)}, tic)
+    return self.finish(None, tic)
+
+  def finish(self, result, tic):
+    if result is None and self.fallback:
+      self.fell_back = True
+      result = self.problem.backtracking_search()
+    self.seconds = perf_counter() - tic
+    return result
+
+  @staticmethod
+  def _update(var, n_conflicts, conflicted, position):
+    """Adds `var` to or removes it from the conflicting regions"""
+    if n_conflicts and position[var] < 0:
+      position[var] = len(conflicted)
+      conflicted.append(var)
+    elif not n_conflicts and position[var] >= 0:
+      # swap with the last one and pop
+      last = conflicted[-1]
+      conflicted[position[var]] = last
+      position[last] = position[var]
+      conflicted.pop()
+      position[var] = -1
+
+
+def _solve_component(job):
+  """Solves one component in a worker process, returns ({name: color} or None, method)"""
+  variables, domains, constraints, max_cutset, max_backtracks = job
+  solver = DecomposedMapColoring(variables, domains, constraints, max_cutset, max_backtracks=max_backtracks)
+  return solver.named(*solver.solve_component(list(range(len(variables)))))
+
+
+def load_map(filename):
+  """Reads a map from an adjacency JSON file or an edge list
+
+    JSON is either {region: [neighbors]} or {"edges": [[a, b], ...]} with an optional
+    "variables" list for the regions without neighbors. An edge list has one "a b" (or "a,b")
+    pair per line, a line with a single region adds it without neighbors, '#' starts a comment.
+
+    Returns:
+      (variables, constraints) for `MapColoring`, region names are strings
+  """
+  with open(filename) as f:
+    if filename.endswith('.json'):
+      data = json.load(f)
+      if 'edges' in data:
+        variables = [str(v) for v in data.get('variables', [])]
+        edges = [(str(a), str(b)) for a, b in data['edges']]
+      else:
+        variables = [str(v) for v in data]
+        edges = [(str(a), str(b)) for a, neighs in data.items() for b in neighs]
+    else:
+      variables, edges = [], []
+      for line in f:
+        fields = line.split('#')[0].replace(',', ' ').split()
+        if len(fields) == 1:
+          variables.append(fields[0])
+        elif len(fields) == 2:
+          edges.append((fields[0], fields[1]))
+        elif fields:
+          raise ValueError(f"Expected 'a b' or 'a' per line, got {line!r}")
+  return _adjacency(variables, edges)
+
+
+def _adjacency(variables, edges):
+  """(variables, constraints) of the regions `variables` and of the ends of `edges`"""
+  neighbors = {v: set() for v in variables}
+  for a, b in edges:
+    neighbors.setdefault(a, set())
+    neighbors.setdefault(b, set())
+    if a != b:
+      neighbors[a].add(b)
+      neighbors[b].add(a)
+  return (tuple(neighbors), {v: tuple(sorted(n)) for v, n in neighbors.items()})
+
+
+def planar_map(n_regions, seed=None):
+  """Random planar map: a grid of about `n_regions` cells with a random diagonal in every
+     square of four cells, so it has triangles, needs four colors in general and has up to
+     eight neighbors per region
+  """
+  rng = random.Random(seed)
+  cols = max(1, round(n_regions ** 0.5))
+  rows = max(1, -(-n_regions // cols))
+  variables = [f"r{i}" for i in range(rows * cols)]
+  edges = []
+  for r in range(rows):
+    for c in range(cols):
+      i = r * cols + c
+      if c + 1 < cols:
+        edges.append((variables[i], variables[i + 1]))
+      if r + 1 < rows:
+        edges.append((variables[i], variables[i + cols]))
+        if c + 1 < cols:
+          if rng.random() < 0.5:
+            edges.append((variables[i], variables[i + cols + 1]))
+          else:
+            edges.append((variables[i + 1], variables[i + cols]))
+  return _adjacency(variables, edges)
+
+
+def planted_map(n_regions, n_colors, avg_degree=4, seed=None):
+  """Random map with a planted coloring: every region gets a hidden color and the edges only
+     join regions of different hidden colors, so the map can be colored with `n_colors`
+
+    Returns:
+      (variables, constraints, hidden): hidden maps every region to its planted color index
+  """
+  rng = random.Random(seed)
+  variables = [f"r{i}" for i in range(n_regions)]
+  hidden = {v: rng.randrange(n_colors) for v in variables}
+  edges = set()
+  n_edges = min(n_regions * avg_degree // 2, n_regions * (n_regions - 1) // 2)
+  if n_colors > 1 and n_regions > 1:
+    while len(edges) < n_edges:
+      a, b = rng.sample(variables, 2)
+      if hidden[a] != hidden[b]:
+        edges.add((min(a, b), max(a, b)))
+  variables, constraints = _adjacency(variables, edges)
+  return (variables, constraints, hidden)
+
+
 variables = ('WA', 'NT', 'Q', 'NSW', 'V', 'SA', 'T')
 domains = ['Red', 'Green', 'Blue']
 constraints = {
@@ -134,6 +852,16 @@ constraints = {
 }
 
 
-mc = MapColoring(variables, domains, constraints)
-result = mc.backtracking_search()
-print(result)
+def main():
+  if len(sys.argv) > 1:
+    # python csp_map_coloring.py map.json [number of colors]
+    regions, neighbors = load_map(sys.argv[1])
+    colors = [f"c{i}" for i in range(int(sys.argv[2]) if len(sys.argv) > 2 else 4)]
+    result = DecomposedMapColoring(regions, colors, neighbors).backtracking_search()
+  else:
+    result = MapColoring(variables, domains, constraints).backtracking_search()
+  print(result)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,161 @@
+"""Scaling benchmark of the map coloring solvers
+
+Generates maps of growing size and records for every solver the solve time (best of
+`--repeat` runs), backtracks, propagation calls, arc revisions and peak memory, the latter in
+its own traced run since tracing slows the search down. Every coloring is verified, a search
+that goes over `--max-backtracks` is reported as 'limit'. The min-conflicts records also hold
+its steps, steps per second, whether it fell back to backtracking and, in the JSON output,
+its convergence curve.
+
+  python map_coloring_benchmark.py                                 # table of the default grid
+  python map_coloring_benchmark.py -n 1000 100000 --maps planted --json
+"""
+import argparse
+import json
+import sys
+import tracemalloc
+from time import perf_counter
+
+from csp_map_coloring import (MapColoring, CompactMapColoring, DecomposedMapColoring,
+                              MinConflictsMapColoring, BacktrackLimitExceeded, planar_map,
+                              planted_map)
+
+MAPS = ['planar', 'planted']
+SOLVERS = ['mapcoloring', 'compact', 'compact-mac', 'decomposed', 'min-conflicts']
+# MapColoring recurses once per region and rescans the whole map at every step, larger maps
+# hit the recursion limit and take too long
+MAX_MAPCOLORING_REGIONS = 500
+
+
+def make_map(kind, n_regions, n_colors, seed):
+  if kind == 'planar':
+    variables, constraints = planar_map(n_regions, seed)
+  else:
+    variables, constraints, _ = planted_map(n_regions, n_colors, seed=seed)
+  return (variables, constraints)
+
+
+def make_solver(solver, variables, domains, constraints, max_backtracks=None):
+  if solver == 'mapcoloring':
+    return MapColoring(variables, domains, constraints)
+  if solver == 'decomposed':
+    return DecomposedMapColoring(variables, domains, constraints, max_backtracks=max_backtracks)
+  if solver == 'min-conflicts':
+    return MinConflictsMapColoring(variables, domains, constraints, seed=0, max_backtracks=max_backtracks)
+  inference = 'mac' if solver == 'compact-mac' else 'forward_checking'
+  return CompactMapColoring(variables, domains, constraints, inference=inference, max_backtracks=max_backtracks)
+
+
+def is_valid(constraints, assignment):
+  return all(assignment[a] != assignment[b] for a, neighs in constraints.items() for b in neighs)
+
+
+def solve(solver, variables, domains, constraints, max_backtracks=None):
+  """Solves the map once
+
+    Returns:
+      (status, seconds, solver object): status is 'solved', 'invalid' (the coloring does not
+        verify), 'unsolvable' or 'limit' (gave up after `max_backtracks`)
+  """
+  tic = perf_counter()
+  problem = make_solver(solver, variables, domains, constraints, max_backtracks)
+  try:
+    result = problem.backtracking_search()
+  except BacktrackLimitExceeded:
+    return ('limit', perf_counter() - tic, problem)
+  seconds = perf_counter() - tic
+  if result is None:
+    return ('unsolvable', seconds, problem)
+  valid = len(result) == len(variables) and is_valid(constraints, result)
+  return ('solved' if valid else 'invalid', seconds, problem)
+
+
+def peak_memory(solver, variables, domains, constraints, max_backtracks=None):
+  tracemalloc.start()
+  try:
+    solve(solver, variables, domains, constraints, max_backtracks)
+    return tracemalloc.get_traced_memory()[1]
+  finally:
+    tracemalloc.stop()
+
+
+def run(sizes, maps=MAPS, solvers=SOLVERS, n_colors=3, repeat=3, seed=0, memory=True,
+        max_backtracks=None):
+  records = []
+  for kind in maps:
+    colors = 4 if kind == 'planar' else n_colors
+    domains = [f"c{i}" for i in range(colors)]
+    for n_regions in sizes:
+      variables, constraints = make_map(kind, n_regions, colors, seed)
+      for solver in solvers:
+        if solver == 'mapcoloring' and len(variables) > MAX_MAPCOLORING_REGIONS:
+          continue
+        runs = [solve(solver, variables, domains, constraints, max_backtracks) for _ in range(repeat)]
+        status, _, problem = runs[0]
+        record = {
+          'map': kind,
+          'regions': len(variables),
+          'edges': sum(len(neighs) for neighs in constraints.values()) // 2,
+          'colors': colors,
+          'solver': solver,
+          'status': status,
+          'seconds': min(r[1] for r in runs),
+          'backtracks': getattr(problem, 'backtracks', None),
+          'propagations': getattr(problem, 'propagations', None),
+          'revisions': getattr(problem, 'revisions', None),
+        }
+        if solver == 'min-conflicts':
+          record.update({
+            'steps': problem.steps,
+            'steps_per_second': problem.steps_per_second,
+            'fell_back': problem.fell_back,
+            'curve': problem.curve,
+          })
+        if memory:
+          record['peak_memory'] = peak_memory(solver, variables, domains, constraints, max_backtracks)
+        records.append(record)
+  return records
+
+
+def print_table(records):
+  def cell(value):
+    return '-' if value is None else value
+
+  print(f"{'map':<9}{'regions':>9}{'edges':>9}{'k':>3} {'solver':<15}{'status':<12}{'time [s]':>10}"
+        f"{'backtracks':>11}{'propag.':>9}{'revisions':>10}{'peak [KiB]':>12}")
+  for r in records:
+    peak = r.get('peak_memory')
+    print(f"{r['map']:<9}{r['regions']:>9}{r['edges']:>9}{r['colors']:>3} {r['solver']:<15}{r['status']:<12}"
+          f"{r['seconds']:>10.3f}{cell(r['backtracks']):>11}{cell(r['propagations']):>9}"
+          f"{cell(r['revisions']):>10}{'-' if peak is None else f'{peak / 1024:.1f}':>12}")
+    if 'steps' in r:
+      print(f"{'':>33}{r['steps']} steps, {r['steps_per_second']:.0f} steps/s"
+            f"{', fell back to backtracking' if r['fell_back'] else ''}")
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+  parser.add_argument('-n', '--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                      help='number of regions of the generated maps')
+  parser.add_argument('--maps', nargs='+', choices=MAPS, default=MAPS)
+  parser.add_argument('--solvers', nargs='+', choices=SOLVERS, default=SOLVERS)
+  parser.add_argument('--colors', type=int, default=3, help='colors of the planted maps, planar maps get 4')
+  parser.add_argument('--repeat', type=int, default=3)
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--max-backtracks', type=int, default=20000, help='backtrack limit of every search')
+  parser.add_argument('--no-memory', action='store_true', help='skip the traced memory runs')
+  parser.add_argument('--json', action='store_true', help='print JSON records instead of a table')
+  args = parser.parse_args()
+
+  records = run(args.sizes, args.maps, args.solvers, args.colors, args.repeat, args.seed,
+                memory=not args.no_memory, max_backtracks=args.max_backtracks)
+  if args.json:
+    json.dump(records, sys.stdout, indent=2)
+    print()
+  else:
+    print_table(records)
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,168 @@
+import functools
+import math
+import random
+
+import numpy as np
+import pytest
+
+from adversarial_search import (
+    tree_depth, vectorized_value, MiniMax, MiniMaxAlphaBeta, ExpectiMiniMax, TreeState, NimState,
+    TranspositionTable, GameAlphaBeta, IterativeDeepening, parallel_alpha_beta
+)
+
+
+def random_trees(n_trees, max_depth=5):
+    rng = np.random.default_rng(0)
+    for _ in range(n_trees):
+        branch_factor = int(rng.integers(2, 5))
+        depth = int(rng.integers(2, max_depth + 1))
+        yield branch_factor, depth, rng.integers(-20, 21, branch_factor ** (depth - 1)).astype(float)
+
+
+def test_tree_depth():
+    assert tree_depth(1, 2) == 1
+    assert tree_depth(3 ** 5, 3) == 6
+    assert tree_depth(10 ** 6, 10) == 7
+    with pytest.raises(ValueError):
+        tree_depth(1, 1)
+
+
+def test_implicit_and_lazy_trees_match_node_trees():
+    for branch_factor, depth, leaves in random_trees(200):
+        node_tree = MiniMax(branch_factor, leaves.tolist())
+        expected = node_tree.value(node_tree.build_tree())
+
+        implicit = MiniMax(branch_factor, leaves, implicit=True)
+        assert implicit.value(implicit.build_tree()) == expected
+        assert implicit.vectorized_value() == expected
+        assert vectorized_value(leaves, branch_factor) == expected
+
+        node_tree = MiniMaxAlphaBeta(branch_factor, leaves.tolist())
+        assert node_tree.value(node_tree.build_tree(), -math.inf, math.inf) == expected
+        implicit = MiniMaxAlphaBeta(branch_factor, leaves, implicit=True)
+        assert implicit.value(implicit.build_tree(), -math.inf, math.inf) == expected
+        assert implicit.leaves_evaluated == node_tree.leaves_evaluated
+        assert implicit.nodes_visited == node_tree.nodes_visited
+
+        calls = []
+        lazy = MiniMaxAlphaBeta(branch_factor, evaluator=lambda i: calls.append(i) or leaves[i], depth=depth)
+        assert lazy.value(lazy.build_tree(), -math.inf, math.inf) == expected
+        # only the leaves the search reached were evaluated, each once
+        assert len(calls) == len(set(calls)) == implicit.leaves_evaluated <= len(leaves)
+
+
+def test_expmax_trees_match():
+    for branch_factor, _, leaves in random_trees(100):
+        expected = MiniMax(branch_factor, leaves.tolist(), expmax=True)
+        expected = expected.value(expected.build_tree())
+        implicit = MiniMax(branch_factor, leaves, expmax=True, implicit=True)
+        assert math.isclose(implicit.value(implicit.build_tree()), expected, abs_tol=1e-9)
+        assert math.isclose(vectorized_value(leaves, branch_factor, expmax=True), expected, abs_tol=1e-9)
+
+
+def test_vectorized_value_batch():
+    rng = np.random.default_rng(1)
+    batch = rng.random((50, 3 ** 4))
+    values = vectorized_value(batch, 3)
+    assert values.shape == (50,)
+    for leaves, value in zip(batch, values):
+        tree = MiniMax(3, leaves.tolist())
+        assert value == tree.value(tree.build_tree())
+
+    with pytest.raises(ValueError):
+        vectorized_value(rng.random(10), 3)
+    with pytest.raises(ValueError):
+        MiniMax(3, batch[0].tolist()).vectorized_value()
+    with pytest.raises(ValueError):
+        MiniMax(3, evaluator=lambda i: 0, depth=3).vectorized_value()
+
+
+def test_lazy_tree_needs_depth():
+    with pytest.raises(ValueError):
+        MiniMax(3, evaluator=lambda i: 0)
+
+
+def test_expectiminimax_pruning():
+    totals = {None: 0, 'star1': 0, 'star2': 0}
+    for branch_factor, depth, leaves in random_trees(300, max_depth=6):
+        rng = random.Random(len(leaves))
+        weights = [rng.random() + 0.1 for _ in range(branch_factor)]
+        uniform = [1 / branch_factor] * branch_factor
+        for probabilities in (uniform, [w / sum(weights) for w in weights]):
+            results = {}
+            for pruning in totals:
+                tree = ExpectiMiniMax(branch_factor, leaves, probabilities=probabilities, pruning=pruning,
+                                      implicit=True)
+                results[pruning] = (tree.value(tree.build_tree()), tree.leaves_evaluated)
+                totals[pruning] += tree.leaves_evaluated
+            expected, enumerated = results[None]
+            assert enumerated == len(leaves)
+            for pruning in ('star1', 'star2'):
+                value, evaluated = results[pruning]
+                assert math.isclose(value, expected, abs_tol=1e-9)
+                assert evaluated <= enumerated
+    assert totals['star1'] < totals[None]
+    assert totals['star2'] < totals[None]
+
+
+def test_expectiminimax_lazy_tree_needs_bounds():
+    with pytest.raises(ValueError):
+        ExpectiMiniMax(2, evaluator=lambda i: 0, depth=3)
+
+
+def nim_value(heaps):
+    """Value for Max to move: the player to move wins when the XOR of the heaps is not 0"""
+    return 1 if functools.reduce(lambda a, b: a ^ b, heaps, 0) else -1
+
+
+NIM_POSITIONS = [(1,), (2, 2), (1, 2, 3), (3, 4, 5), (1, 3, 5), (2, 3, 4), (1, 1, 1), (4, 4)]
+
+
+def test_nim_transposition_table():
+    for heaps in NIM_POSITIONS:
+        depth = sum(heaps)
+        search = GameAlphaBeta()
+        assert search.value(NimState(heaps), depth) == nim_value(heaps)
+        # a table of a few slots keeps replacing entries, the value is still exact
+        assert GameAlphaBeta(TranspositionTable(size=4)).value(NimState(heaps), depth) == nim_value(heaps)
+    # positions reached by different move orders are found in the table
+    search = GameAlphaBeta()
+    search.value(NimState((3, 4, 5)), 12)
+    assert search.table.hits > 0
+
+
+def test_nim_iterative_deepening():
+    for heaps in NIM_POSITIONS:
+        move, value, report = IterativeDeepening().search(NimState(heaps))
+        assert value == nim_value(heaps)
+        assert [r['depth'] for r in report] == list(range(1, len(report) + 1))
+        if value == 1:
+            # a winning move leaves heaps that XOR to 0
+            i, take = move
+            after = list(heaps)
+            after[i] -= take
+            assert nim_value(after) == -1
+
+
+def test_tree_state_matches_alpha_beta():
+    for branch_factor, depth, leaves in random_trees(100):
+        tree = MiniMaxAlphaBeta(branch_factor, leaves, implicit=True)
+        expected = tree.value(tree.build_tree(), -math.inf, math.inf)
+        assert GameAlphaBeta().value(TreeState(tree, tree.build_tree()), depth - 1) == expected
+
+
+def test_parallel_alpha_beta():
+    for branch_factor, depth in ((4, 6), (6, 5), (3, 2)):
+        leaves = np.random.default_rng(depth).random(branch_factor ** (depth - 1))
+        tree = MiniMaxAlphaBeta(branch_factor, leaves, implicit=True)
+        expected = tree.value(tree.build_tree(), -math.inf, math.inf)
+        # a single worker searches the younger brothers in order, like the serial search
+        value, best, evaluated = parallel_alpha_beta(MiniMaxAlphaBeta(branch_factor, leaves, implicit=True),
+                                                     workers=1)
+        assert (value, evaluated) == (expected, tree.leaves_evaluated)
+        assert best in range(1, branch_factor + 1)
+        value, _, _ = parallel_alpha_beta(MiniMaxAlphaBeta(branch_factor, leaves, implicit=True), workers=2)
+        assert value == expected
+
+    with pytest.raises(ValueError):
+        parallel_alpha_beta(MiniMaxAlphaBeta(2, [1, 2, 3, 4]))
@@ -0,0 +1,89 @@
+import itertools
+import random
+
+from csp_map_coloring import MapColoring, MinConflictsMapColoring, CompactMapColoring
+
+
+def random_map(rng, n, p):
+    """Random map of `n` regions with symmetric constraints, every pair adjacent with probability p"""
+    variables = [f"r{i}" for i in range(n)]
+    neighbors = {v: [] for v in variables}
+    for a, b in itertools.combinations(variables, 2):
+        if rng.random() < p:
+            neighbors[a].append(b)
+            neighbors[b].append(a)
+    return variables, neighbors
+
+
+def is_coloring(result, constraints):
+    return all(result[a] != result[b] for a, neighs in constraints.items() for b in neighs)
+
+
+def test_map_coloring_restores_domains():
+    # K4 with three colors: AC-3 wipes out a domain after the second assignment, the search has to
+    # undo it and try every color of the first two regions before giving up
+    variables = ('a', 'b', 'c', 'd')
+    constraints = {v: tuple(w for w in variables if w != v) for v in variables}
+    colors = ['Red', 'Green', 'Blue']
+    problem = MapColoring(variables, colors, constraints)
+    assert problem.backtracking_search() is None
+    assert problem.backtracks > 0
+    assert problem.trail == []
+    assert all(ter.domains == colors and ter.color is None for ter in problem.territories.values())
+
+    # a colorable map whose first branch fails, the next one starts from the restored domains
+    constraints = {
+        'r0': ('r2', 'r3', 'r6', 'r8'), 'r1': ('r2', 'r3', 'r4', 'r7'), 'r2': ('r0', 'r1', 'r4', 'r5'),
+        'r3': ('r0', 'r1', 'r5', 'r6'), 'r4': ('r1', 'r2', 'r8'), 'r5': ('r2', 'r3', 'r6', 'r7', 'r8'),
+        'r6': ('r0', 'r3', 'r5', 'r7', 'r8'), 'r7': ('r1', 'r5', 'r6'), 'r8': ('r0', 'r4', 'r5', 'r6'),
+    }
+    problem = MapColoring(tuple(constraints), colors, constraints)
+    result = problem.backtracking_search()
+    assert problem.backtracks > 0
+    assert result is not None and is_coloring(result, constraints)
+
+
+def test_map_coloring_brute_force():
+    for seed in range(400):
+        rng = random.Random(seed)
+        variables, constraints = random_map(rng, rng.randint(1, 8), 0.5)
+        colors = [f"c{i}" for i in range(rng.randint(2, 3))]
+        colorable = any(is_coloring(dict(zip(variables, assignment)), constraints)
+                        for assignment in itertools.product(colors, repeat=len(variables)))
+        problem = MapColoring(variables, colors, constraints)
+        result = problem.backtracking_search()
+        assert (result is not None) == colorable
+        if result is not None:
+            assert is_coloring(result, constraints)
+        else:
+            assert all(ter.domains == colors for ter in problem.territories.values())
+
+
+def test_min_conflicts_single_color():
+    constraints = {'a': ('b',), 'b': ('a',)}
+    search = MinConflictsMapColoring(['a', 'b'], ['c0'], constraints, seed=0, fallback=False)
+    assert search.search() is None
+    assert search.steps == 0
+
+    search = MinConflictsMapColoring(['a', 'b'], ['c0'], constraints, seed=0)
+    assert search.backtracking_search() is None
+    assert search.fell_back
+
+    search = MinConflictsMapColoring(['a', 'b'], ['c0'], {'a': (), 'b': ()}, seed=0)
+    assert search.backtracking_search() == {'a': 'c0', 'b': 'c0'}
+
+
+def test_min_conflicts_random_maps():
+    for seed in range(300):
+        rng = random.Random(seed)
+        n = rng.randint(2, 8)
+        k = rng.randint(1, 3)
+        variables = [f"r{i}" for i in range(n)]
+        constraints = {v: tuple(w for w in variables[i + 1:] if rng.random() < 0.4)
+                       for i, v in enumerate(variables)}
+        colors = [f"c{i}" for i in range(k)]
+        expected = CompactMapColoring(variables, colors, constraints).backtracking_search()
+        result = MinConflictsMapColoring(variables, colors, constraints, seed=seed, max_steps=200).backtracking_search()
+        assert (result is None) == (expected is None)
+        if result is not None:
+            assert all(result[a] != result[b] for a, neighs in constraints.items() for b in neighs)